@@ -0,0 +1,40 @@
+"""
+Texts/second of the HuggingFace sentiment pipeline at several batch sizes.
+Uses the titles and summaries in data/politic_news.json.
+
+    python benchmark_hf_batching.py [texts] [batch_size ...]
+    python benchmark_hf_batching.py 256 1 4 8 16 32
+"""
+import sys
+import time
+import working_wjson as wj
+from politics import HF_MODEL, get_hf_pipeline, huggingface_batch
+
+
+def load_texts(limit, path='data/politic_news.json'):
+    texts = []
+    for articles in wj.load_from_json(path).values():
+        texts.extend(f"{article['title']} {article['summary']}" for article in articles)
+    return texts[:limit]
+
+
+def main():
+    limit = int(sys.argv[1]) if len(sys.argv) > 1 else 256
+    batch_sizes = [int(arg) for arg in sys.argv[2:]] or [1, 4, 8, 16, 32]
+    classifier = get_hf_pipeline()
+    texts = load_texts(limit)
+    print(f"{len(texts)} texts, model {HF_MODEL}")
+    # Warm-up so the first measurement does not pay for lazy initialization
+    huggingface_batch(classifier, texts[:2], batch_size=2)
+    baseline = None
+    for batch_size in batch_sizes:
+        start = time.perf_counter()
+        results = huggingface_batch(classifier, texts, batch_size=batch_size)
+        elapsed = time.perf_counter() - start
+        rate = len(results) / elapsed if elapsed else 0.0
+        baseline = baseline or rate
+        print(f"batch_size={batch_size:>3}  {elapsed:8.2f} s  {rate:7.1f} texts/s  x{rate / baseline:4.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Articles/second of single-article vs batched political scoring.
+Needs a running Ollama server with llama2:7b and data/politic_news.json.
+
+    python benchmark_political_batching.py [articles] [batch_size ...]
+    python benchmark_political_batching.py 20 1 5 10
+"""
+import sys
+import time
+import working_wjson as wj
+from politics import PoliticalUncertaintyAnalyzer
+
+
+def load_summaries(limit, path='data/politic_news.json'):
+    summaries = []
+    for articles in wj.load_from_json(path).values():
+        summaries.extend(article['summary'] for article in articles)
+    return summaries[:limit]
+
+
+def run(analyzer, summaries, batch_size):
+    start = time.perf_counter()
+    scores = []
+    for n in range(0, len(summaries), batch_size):
+        chunk = summaries[n:n + batch_size]
+        if batch_size == 1:
+            scores.append(analyzer.politic_uncertity(chunk[0])['political_uncertainty_score'])
+        else:
+            scores.extend(item['political_uncertainty_score'] for item in analyzer.politic_uncertity_batch(chunk))
+    elapsed = time.perf_counter() - start
+    return elapsed, scores
+
+
+def main():
+    limit = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    batch_sizes = [int(arg) for arg in sys.argv[2:]] or [1, 5, 10]
+    analyzer = PoliticalUncertaintyAnalyzer()
+    # Measure the model, not the response cache
+    analyzer.ollama_client.response_cache = None
+    summaries = load_summaries(limit)
+    print(f"{len(summaries)} articles")
+    baseline = None
+    for batch_size in batch_sizes:
+        elapsed, scores = run(analyzer, summaries, batch_size)
+        rate = len(summaries) / elapsed if elapsed else 0.0
+        baseline = baseline or rate
+        average = sum(scores) / len(scores) if scores else 0
+        print(f"batch_size={batch_size:>3}  {elapsed:8.1f} s  {rate:6.2f} articles/s  x{rate / baseline:4.1f}  avg score {average:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,46 @@
-import yfinance as yf
+import logging
 from datetime import datetime
 import working_wjson as wj
+import keyword_matcher
+import price_cache
+import indicators
+import fundamentals_cache
+import ttl_cache
 import news 
 import bot
+from log_utils import timed
+
+logger = logging.getLogger(__name__)
+
+
+# Sentiment metric key -> news store
+NEWS_SOURCES = (
+    ('X', 'data/x_tweets.json'),
+    ('Y', 'data/yf_news.json'),
+    ('G', 'data/google_news.json'),
+)
+SOURCE_LABELS = {'X': 'X', 'Y': 'Yahoo', 'G': 'Google'}
+
+def sigfig(x, n=2):
+    """Round to n significant figures, always as float."""
+    if x == 0:
+        return 0.0
+    s = f"{x:.{n}g}"
+    if 'e' not in s and '.' in s:
+        int_part, dec_part = s.split('.')
+        if len(dec_part) < n-1:
+            s += '0' * (n-1 - len(dec_part))
+    return float(s)
+
+
+_indicator_engine = None
+
+def get_indicator_engine():
+    """Process-wide IndicatorEngine, so rolling state survives new CompanyAnalyzer instances."""
+    global _indicator_engine
+    if _indicator_engine is None:
+        _indicator_engine = indicators.IndicatorEngine()
+    return _indicator_engine
 
 
 class CompanyAnalyzer:
@@ -10,53 +48,84 @@ class CompanyAnalyzer:
         """Calculate and return sentiment metrics for a single company from all sources, ignoring sources with zero data."""
         import working_wjson as wj
         # Step 1: Data Collection Phase
-        x_news = wj.load_from_json('data/x_tweets.json').get(company, {})
-        y_news = wj.load_from_json('data/yf_news.json').get(company, {})
-        g_news = wj.load_from_json('data/google_news.json').get(company, {})
+        x_news = wj.get_store('data/x_tweets.json').get(company, {})
+        y_news = wj.get_store('data/yf_news.json').get(company, {})
+        g_news = wj.get_store('data/google_news.json').get(company, {})
         # Step 2: Sentiment Analysis Phase
-        x_sentiment = self.get_news_sentiment(x_news)
-        y_sentiment = self.get_news_sentiment(y_news)
-        g_sentiment = self.get_news_sentiment(g_news)
+        counts = {}
+        for key, news_items in (('X', x_news), ('Y', y_news), ('G', g_news)):
+            sentiment = self.get_news_sentiment(news_items)
+            counts[key] = (sentiment['news_count'], sentiment['positive_count'], sentiment['negative_count'])
         # Step 3: Only include sources with news_count > 0
+        return self._sentiment_metrics_from_counts(company, counts)
+
+    def get_all_companies_sentiment_metrics(self, companies=None):
+        """
+        Batch version of get_single_company_sentiment_metrics.
+        Every news source is loaded once and every article is scored once,
+        so the cost grows linearly with the number of companies.
+        Returns {company: metrics}.
+        """
+        if companies is None:
+            companies = list(self.companies.keys())
+        with timed(logger, 'get_all_companies_sentiment_metrics') as timing:
+            sources = {key: wj.get_store(path).load() for key, path in NEWS_SOURCES}
+            matcher = keyword_matcher.get_sentiment_matcher()
+            total_data = {}
+            for company in companies:
+                counts = {key: self._count_sentiment(sources[key].get(company, {}), matcher) for key in sources}
+                total_data[company] = self._sentiment_metrics_from_counts(company, counts)
+            keyword_matcher.get_article_cache().flush()
+            timing['companies'] = len(total_data)
+        return total_data
+
+    def _count_sentiment(self, news, matcher):
+        """Return (news_count, positive_count, negative_count) for a dict or list of articles."""
+        if isinstance(news, dict):
+            articles = news.values()
+        elif isinstance(news, list):
+            articles = news
+        else:
+            return (0, 0, 0)
+        news_count = total_positive = total_negative = 0
+        for article in articles:
+            text_to_analyze = (article.get('title', '') + ' ' + article.get('summary', '')).lower()
+            positive_score, negative_score, _, _ = keyword_matcher.score_text(text_to_analyze, matcher)
+            if positive_score > negative_score:
+                total_positive += 1
+            elif negative_score > positive_score:
+                total_negative += 1
+            news_count += 1
+        return (news_count, total_positive, total_negative)
+
+    def _sentiment_metrics_from_counts(self, company, counts):
+        """Build the P_X/N_X/sample_X... dict from {source: (news_count, positive, negative)}."""
         sources = []
         metrics = {}
-        def sigfig(x, n=2):
-            if x == 0:
-                return 0.0
-            s = f"{x:.{n}g}"
-            if 'e' not in s and '.' in s:
-                int_part, dec_part = s.split('.')
-                if len(dec_part) < n-1:
-                    s += '0' * (n-1 - len(dec_part))
-            return float(s)
-        if x_sentiment['news_count'] > 0:
-            metrics['P_X'] = sigfig(x_sentiment['positive_porcent'] / 100)
-            metrics['N_X'] = sigfig(x_sentiment['negative_porcent'] / 100)
-            metrics['sample_X'] = x_sentiment['news_count']
-            sources.append('X')
-        if y_sentiment['news_count'] > 0:
-            metrics['P_Y'] = sigfig(y_sentiment['positive_porcent'] / 100)
-            metrics['N_Y'] = sigfig(y_sentiment['negative_porcent'] / 100)
-            metrics['sample_Y'] = y_sentiment['news_count']
-            sources.append('Yahoo')
-        if g_sentiment['news_count'] > 0:
-            metrics['P_G'] = sigfig(g_sentiment['positive_porcent'] / 100)
-            metrics['N_G'] = sigfig(g_sentiment['negative_porcent'] / 100)
-            metrics['sample_G'] = g_sentiment['news_count']
-            sources.append('Google')
-        # Add debug output to show which sources are used
-        print(f"[DEBUG] Sentiment sources used for {company}: {sources}")
+        for key in ('X', 'Y', 'G'):
+            news_count, positive, negative = counts[key]
+            if news_count > 0:
+                metrics[f'P_{key}'] = sigfig(positive * 100 / news_count / 100)
+                metrics[f'N_{key}'] = sigfig(negative * 100 / news_count / 100)
+                metrics[f'sample_{key}'] = news_count
+                sources.append(SOURCE_LABELS[key])
+        logger.debug("Sentiment sources used for %s: %s", company, sources)
         if not sources:
-            print(f"[DEBUG] No sentiment data found for {company} (all sources empty)")
+            logger.debug("No sentiment data found for %s (all sources empty)", company)
         return metrics
+
     def __init__(self):
         self.companies = wj.load_from_json('data/companies.json')
+        # Daily OHLCV served from disk; replace with a PriceHistoryCache(source=...) in tests
+        self.price_cache = price_cache.get_price_cache()
+        self.indicator_engine = get_indicator_engine()
+        # yfinance .info with per-field TTLs; a known ticker never blocks on it
+        self.fundamentals = fundamentals_cache.get_fundamentals_cache()
         
     def get_company_fundamentals(self, ticker):
         """Get fundamental data for a company"""
         try:
-            stock = yf.Ticker(ticker)
-            info = stock.info
+            info = self.fundamentals.get_info(ticker)
             return {
                 'market_cap': info.get('marketCap', 'N/A'),
                 'pe_ratio': info.get('trailingPE', 'N/A'),
@@ -82,54 +151,42 @@ class CompanyAnalyzer:
     def get_technical_analysis(self, ticker, period="1y"):
         """Get technical analysis for a company"""
         try:
-            stock = yf.Ticker(ticker)
-            hist = stock.history(period=period)
-            if hist.empty:
-                return None
-            # Calculate technical indicators
-            hist['MA_20'] = hist['Close'].rolling(window=20).mean()
-            hist['MA_50'] = hist['Close'].rolling(window=50).mean()
-            hist['MA_200'] = hist['Close'].rolling(window=200).mean()
-            # RSI
-            delta = hist['Close'].diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-            rs = gain / loss
-            hist['RSI'] = 100 - (100 / (1 + rs))
-            # Bollinger Bands
-            hist['BB_Middle'] = hist['Close'].rolling(window=20).mean()
-            bb_std = hist['Close'].rolling(window=20).std()
-            hist['BB_Upper'] = hist['BB_Middle'] + (bb_std * 2)
-            hist['BB_Lower'] = hist['BB_Middle'] - (bb_std * 2)
-            # Volatility
-            hist['Volatility'] = hist['Close'].rolling(window=20).std()
-            current = hist.iloc[-1]
-            # Performance calculations
-            ytd_start = hist.loc[hist.index >= f"{datetime.now().year}-01-01"].iloc[0] if len(hist.loc[hist.index >= f"{datetime.now().year}-01-01"]) > 0 else hist.iloc[0]
-            month_ago = hist.iloc[-22] if len(hist) >= 22 else hist.iloc[0]
-            year_ago = hist.iloc[-252] if len(hist) >= 252 else hist.iloc[0]
-            return {
-                'current_price': current['Close'],
-                'ma_20': current['MA_20'],
-                'ma_50': current['MA_50'],
-                'ma_200': current['MA_200'],
-                'rsi': current['RSI'],
-                'volatility': current['Volatility'],
-                'volume': current['Volume'],
-                'bb_upper': current['BB_Upper'],
-                'bb_lower': current['BB_Lower'],
-                'price_vs_bb': self.get_bb_position(current['Close'], current['BB_Upper'], current['BB_Lower']),
-                'ytd_return': ((current['Close'] - ytd_start['Close']) / ytd_start['Close']) * 100,
-                'month_return': ((current['Close'] - month_ago['Close']) / month_ago['Close']) * 100,
-                'year_return': ((current['Close'] - year_ago['Close']) / year_ago['Close']) * 100,
-                '52_week_high': hist['Close'].max(),
-                '52_week_low': hist['Close'].min(),
-                'distance_from_high': ((current['Close'] - hist['Close'].max()) / hist['Close'].max()) * 100,
-                'distance_from_low': ((current['Close'] - hist['Close'].min()) / hist['Close'].min()) * 100
-            }
+            return self._technical_from_bars(ticker, self.price_cache.bars(ticker, period=period), period)
         except Exception as e:
             print(f"Error calculating technical analysis for {ticker}: {e}")
             return None
+
+    def get_technical_analysis_batch(self, tickers, period="1y"):
+        """
+        get_technical_analysis for many tickers. Missing or stale histories are
+        refreshed with one batched download instead of one call per ticker.
+        Returns {TICKER: technical dict or None}.
+        """
+        try:
+            all_bars = self.price_cache.bars_many(tickers, period=period)
+        except Exception as e:
+            print(f"Error downloading price history for {list(tickers)}: {e}")
+            return {ticker.upper(): None for ticker in tickers}
+        results = {}
+        for ticker, bars in all_bars.items():
+            try:
+                results[ticker] = self._technical_from_bars(ticker, bars, period)
+            except Exception as e:
+                print(f"Error calculating technical analysis for {ticker}: {e}")
+                results[ticker] = None
+        return results
+
+    def _technical_from_bars(self, ticker, bars, period):
+        if bars is None or len(bars) == 0:
+            return None
+        if period == "1y":
+            # Incremental indicators: only bars not seen yet are fed to the engine
+            current = self.indicator_engine.update(ticker, bars['date'], bars['Close'], bars['Volume'],
+                                                   revision=self.price_cache.revision(ticker))
+        else:
+            current = indicators.pandas_indicators(price_cache.to_frame(bars))
+        current['price_vs_bb'] = self.get_bb_position(current['current_price'], current['bb_upper'], current['bb_lower'])
+        return current
     
     def get_bb_position(self, price, upper, lower):
         """Determine position within Bollinger Bands"""
@@ -313,54 +370,59 @@ class CompanyAnalyzer:
                 'negative_porcent': 0,
                 'articles': []
             }
-        positive_keywords = [w.lower() for w in wj.load_from_json('data/positive_keywords.json')]
-        negative_keywords = [w.lower() for w in wj.load_from_json('data/negative_keywords.json')]
-        analyzed_articles = []
-        total_positive = 0
-        total_negative = 0
-        # Accept both dict and list
-        articles = []
-        if isinstance(news, dict):
-            for k in news.keys():
-                articles.append(news[k])
-        elif isinstance(news, list):
-            articles = news
-        for article in articles:
-            title = article.get('title', '')
-            summary = article.get('summary', '')
-            text_to_analyze = (title + ' ' + summary).lower()
-            matched_pos = [word for word in positive_keywords if word in text_to_analyze]
-            matched_neg = [word for word in negative_keywords if word in text_to_analyze]
-            positive_score = len(matched_pos)
-            negative_score = len(matched_neg)
-            if positive_score > negative_score:
-                sentiment = "📈 Positive"
-                total_positive += 1
-            elif negative_score > positive_score:
-                sentiment = "📉 Negative"
-                total_negative += 1
+        # Per-article output only when DEBUG is on; no formatting otherwise
+        debug = logger.isEnabledFor(logging.DEBUG)
+        with timed(logger, 'get_news_sentiment') as timing:
+            matcher = keyword_matcher.get_sentiment_matcher()
+            analyzed_articles = []
+            total_positive = 0
+            total_negative = 0
+            # Accept both dict and list
+            articles = []
+            if isinstance(news, dict):
+                for k in news.keys():
+                    articles.append(news[k])
+            elif isinstance(news, list):
+                articles = news
+            for article in articles:
+                title = article.get('title', '')
+                summary = article.get('summary', '')
+                text_to_analyze = (title + ' ' + summary).lower()
+                positive_score, negative_score, matched_pos, matched_neg = keyword_matcher.score_text(text_to_analyze, matcher)
+                if positive_score > negative_score:
+                    sentiment = "📈 Positive"
+                    total_positive += 1
+                elif negative_score > positive_score:
+                    sentiment = "📉 Negative"
+                    total_negative += 1
+                else:
+                    sentiment = "➡️ Neutral"
+                if debug:
+                    logger.debug("Article: %s... | Sentiment: %s | Pos: %d (%s) | Neg: %d (%s)",
+                                 title[:80], sentiment, positive_score,
+                                 matched_pos if matched_pos is not None else 'cached',
+                                 negative_score, matched_neg if matched_neg is not None else 'cached')
+                analyzed_articles.append({
+                    'title': title,
+                    'sentiment': sentiment,
+                    'publisher': article.get("provider", "?")
+                })
+            if total_positive > total_negative:
+                overall_sentiment = "📈 Overall Positive"
+            elif total_negative > total_positive:
+                overall_sentiment = "📉 Overall Negative"
             else:
-                sentiment = "➡️ Neutral"
-            print(f"[DEBUG] Article: {title[:80]}...")
-            print(f"         Sentiment: {sentiment} | Pos: {positive_score} ({matched_pos}) | Neg: {negative_score} ({matched_neg})")
-            analyzed_articles.append({
-                'title': title,
-                'sentiment': sentiment,
-                'publisher': article.get("provider", "?")
-            })
-        if total_positive > total_negative:
-            overall_sentiment = "📈 Overall Positive"
-        elif total_negative > total_positive:
-            overall_sentiment = "📉 Overall Negative"
-        else:
-            overall_sentiment = "➡️ Overall Neutral"
-        if len(analyzed_articles) > 0:
-            positive_porcent = total_positive * 100 / len(analyzed_articles)
-            negative_porcent = total_negative * 100 / len(analyzed_articles)
-        else:
-            positive_porcent = 0
-            negative_porcent = 0
-        print(f"[DEBUG] Total: {len(analyzed_articles)} | Positive: {total_positive} | Negative: {total_negative} | Neutral: {len(analyzed_articles) - total_positive - total_negative}")
+                overall_sentiment = "➡️ Overall Neutral"
+            if len(analyzed_articles) > 0:
+                positive_porcent = total_positive * 100 / len(analyzed_articles)
+                negative_porcent = total_negative * 100 / len(analyzed_articles)
+            else:
+                positive_porcent = 0
+                negative_porcent = 0
+            keyword_matcher.get_article_cache().flush_if_stale()
+            logger.debug("Total: %d | Positive: %d | Negative: %d | Neutral: %d", len(analyzed_articles),
+                         total_positive, total_negative, len(analyzed_articles) - total_positive - total_negative)
+            timing['articles'] = len(analyzed_articles)
         return {
             'sentiment': overall_sentiment,
             'news_count': len(analyzed_articles),
@@ -431,8 +493,7 @@ class CompanyAnalyzer:
       
     def get_company_name_from_ticker(self,ticker):
         try:
-            stock = yf.Ticker(ticker)
-            info = stock.info
+            info = self.fundamentals.get_info(ticker, fundamentals_cache.IDENTITY_FIELDS)
             name = info.get('shortName') 
             if not name:
                 name = info.get('longName', ticker)
@@ -454,9 +515,7 @@ class CompanyAnalyzer:
             return {}
         # Load platform-specific search queries for each company (if needed)
         queries = wj.load_from_json(queries_path)
-        total_data = {}
-        for company in companies:
-            total_data[company] = self.get_single_company_sentiment_metrics(company)
+        total_data = self.get_all_companies_sentiment_metrics(companies)
         wj.save_to_json(total_data, 'data/data_total_analyze.json')
         return total_data
 
@@ -465,6 +524,7 @@ class TwitterFormattedAnalyzer(CompanyAnalyzer):
         super().__init__()
         self.political_uncertity=wj.load_from_json('data/uncertity_per_company.json')
         self.news_extractor= news.NewsExtractor()
+        self.company_analysis_cache = ttl_cache.get_company_analysis_cache()
     
     def format_twitter_analysis(self, company_name='Tesla', ticker=None):
         """Generate a Twitter-formatted analysis string for a company, aggregating news from all sources."""
@@ -477,9 +537,9 @@ class TwitterFormattedAnalyzer(CompanyAnalyzer):
         technical = self.get_technical_analysis(ticker)
 
         # Always convert news dicts to lists before merging
-        news_x_dict = wj.load_from_json('data/x_tweets.json').get(company_name, {})
-        news_y_dict = wj.load_from_json('data/yf_news.json').get(company_name, {})
-        news_g_dict = wj.load_from_json('data/google_news.json').get(company_name, {})
+        news_x_dict = wj.get_store('data/x_tweets.json').get(company_name, {})
+        news_y_dict = wj.get_store('data/yf_news.json').get(company_name, {})
+        news_g_dict = wj.get_store('data/google_news.json').get(company_name, {})
         news_x = list(news_x_dict.values()) if isinstance(news_x_dict, dict) else []
         news_y = list(news_y_dict.values()) if isinstance(news_y_dict, dict) else []
         news_g = list(news_g_dict.values()) if isinstance(news_g_dict, dict) else []
@@ -639,26 +699,16 @@ class TwitterFormattedAnalyzer(CompanyAnalyzer):
         """
         Returns cached analysis for a ticker if available and fresh (10 min), else generates new and updates cache.
         Only analyzes the provided ticker/company, never all companies. Robust error handling.
+        Shares the process-wide analysis cache with TwitterClient.generate_ai_analysis.
         """
         if not ticker:
             return "[ERROR] No ticker provided for analysis."
-        cache_key = ticker
-        import time
-        now = time.time()
-        # Check cache
-        if cache_key in self.company_analysis_cache:
-            ts, cached_analysis = self.company_analysis_cache[cache_key]
-            if now - ts < 600:  # 10 minutes
-                return cached_analysis
-        # Not cached or expired, generate new analysis
         try:
-            import company_analyzer as ca
-            analysis = ca.get_company_analysis(company_name, ticker)
+            # RSS feed code fully removed
+            return self.company_analysis_cache.get_or_compute(
+                ticker.upper(), lambda: get_company_analysis(company_name, ticker), cache_if=ttl_cache.cacheable_analysis)
         except Exception as e:
             return f"[ERROR] Could not generate analysis for {ticker}: {e}"
-        # RSS feed code fully removed
-        self.company_analysis_cache[cache_key] = (now, analysis)
-        return analysis
         
         analysis += "Monitor: News and volume in real-time.\n\n\n"
         
@@ -707,9 +757,9 @@ def get_company_analysis(company_name=None,ticker=None):
             return f"[ERROR] Could not update news/JSONs for {company_name} ({ticker}): {e}"
         # Step 3: Check that news is present before analysis
         import working_wjson as wj
-        news_x = wj.load_from_json('data/x_tweets.json').get(company_name, {})
-        news_y = wj.load_from_json('data/yf_news.json').get(company_name, {})
-        news_g = wj.load_from_json('data/google_news.json').get(company_name, {})
+        news_x = wj.get_store('data/x_tweets.json').get(company_name, {})
+        news_y = wj.get_store('data/yf_news.json').get(company_name, {})
+        news_g = wj.get_store('data/google_news.json').get(company_name, {})
         total_news = 0
         if isinstance(news_x, dict):
             total_news += len(news_x)
@@ -733,13 +783,18 @@ def get_company_analysis(company_name=None,ticker=None):
 
     return analyzer.format_twitter_analysis(company_name,ticker)
 
-def post_company_analysis(company_name):
+def post_company_analysis(company_name, ticker=None):
     """Get analysis for a company and post it to Twitter"""
     
     print(f"📊 Getting analysis for {company_name}...")
+    if ticker is None:
+        ticker = wj.load_from_json('data/companies.json').get(company_name)
     
-    # Get the formatted analysis
-    analysis = get_company_analysis(company_name) 
+    # Get the formatted analysis (technical data comes from the price cache filled by get_technical_analysis_batch)
+    analysis = get_company_analysis(company_name, ticker)
+    if not analysis or str(analysis).startswith('[ERROR]'):
+        print(f"[ERROR] Not posting analysis for {company_name}: {analysis}")
+        return None
     
     # Post to Twitter
     print("📤 Posting to Twitter...")
@@ -0,0 +1,96 @@
+import atexit
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+import working_wjson as wj
+
+
+class PersistentLRUCache:
+    """
+    Size-bounded LRU dictionary persisted as a JSON file between runs.
+    Entries are kept in least-recently-used order, so the file can be loaded
+    back as-is. Values must be JSON serializable.
+    """
+    def __init__(self, path, max_entries=20000):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = None
+        self._dirty = False
+        self._last_flush = time.time()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def _load(self):
+        if self._entries is None:
+            data = {}
+            if os.path.exists(self.path):
+                try:
+                    # Read directly: the entries are kept here, a second copy in wj's cache would be waste
+                    with open(self.path, 'r') as file:
+                        data = json.load(file)
+                except (OSError, ValueError) as e:
+                    print(f"[WARN] Could not read cache {self.path}: {e}")
+            self._entries = OrderedDict(data if isinstance(data, dict) else {})
+        return self._entries
+
+    def get(self, key, default=None):
+        with self._lock:
+            entries = self._load()
+            if key in entries:
+                entries.move_to_end(key)
+                self.hits += 1
+                return entries[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        with self._lock:
+            entries = self._load()
+            entries[key] = value
+            entries.move_to_end(key)
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+                self.evictions += 1
+            self._dirty = True
+
+    def __len__(self):
+        with self._lock:
+            return len(self._load())
+
+    def flush(self):
+        """Write the cache to disk if it changed since the last flush."""
+        # _flush_lock keeps writes in order; get/put only wait for the shallow snapshot
+        with self._flush_lock:
+            with self._lock:
+                if not self._dirty or self._entries is None:
+                    return
+                snapshot = dict(self._entries)
+                self._dirty = False
+                self._last_flush = time.time()
+            try:
+                wj.write_json(snapshot, self.path)
+            except BaseException:
+                with self._lock:
+                    self._dirty = True
+                raise
+
+    def flush_if_stale(self, min_interval=60):
+        """Flush at most once every min_interval seconds (for hot paths)."""
+        if time.time() - self._last_flush >= min_interval:
+            self.flush()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'entries': len(self),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / total, 3) if total else 0.0,
+        }
@@ -0,0 +1,171 @@
+import os
+import threading
+import time
+import working_wjson as wj
+
+FUNDAMENTALS_CACHE_PATH = 'data/fundamentals_cache.json'
+
+MINUTE = 60
+DAY = 24 * 60 * MINUTE
+
+# yfinance .info field -> seconds before it is refreshed (None = never)
+FIELD_TTLS = {
+    # Identity
+    'shortName': None,
+    'longName': None,
+    'sector': None,
+    'industry': None,
+    'businessSummary': 7 * DAY,
+    'fullTimeEmployees': 7 * DAY,
+    # Move with the price
+    'marketCap': 15 * MINUTE,
+    'trailingPE': 15 * MINUTE,
+    'forwardPE': 15 * MINUTE,
+    'priceToBook': 15 * MINUTE,
+    'dividendYield': 15 * MINUTE,
+    # Change with the quarterly reports
+    'debtToEquity': DAY,
+    'returnOnEquity': DAY,
+    'profitMargins': DAY,
+    'revenueGrowth': DAY,
+    'earningsGrowth': DAY,
+    'currentRatio': DAY,
+    'beta': DAY,
+}
+IDENTITY_FIELDS = ('shortName', 'longName')
+# Fields the source did not report (rate limit, empty .info) are retried after this
+MISSING_RETRY = 15 * MINUTE
+# A known value the source keeps not reporting is dropped after this long
+MISSING_KEEP = DAY
+
+
+def yfinance_info(ticker):
+    import yfinance as yf
+    return yf.Ticker(ticker).info
+
+
+class FundamentalsCache:
+    """
+    Persistent cache of yfinance .info fields per ticker with per-field TTLs.
+    A known ticker is always answered from the cache: stale fields are
+    returned as-is and refreshed in a background thread. Only a ticker (or
+    field) never fetched before blocks on the source.
+    The source is any callable fetch(ticker) returning an info dict.
+    """
+    def __init__(self, path=FUNDAMENTALS_CACHE_PATH, fetch=None, ttls=None):
+        self.path = path
+        self.fetch = fetch or yfinance_info
+        self.ttls = ttls or FIELD_TTLS
+        self.fetches = 0
+        self._entries = None
+        self._lock = threading.Lock()
+        self._ticker_locks = {}
+        self._refreshing = set()
+
+    def _load(self):
+        if self._entries is None:
+            data = {}
+            if os.path.exists(self.path):
+                try:
+                    data = wj.load_from_json(self.path)
+                except (OSError, ValueError) as e:
+                    print(f"[WARN] Could not read fundamentals cache {self.path}: {e}")
+            # {TICKER: {'values': {field: value}, 'fetched': {field: timestamp},
+            #           'missing': {field: first unreported timestamp}}}
+            self._entries = dict(data) if isinstance(data, dict) else {}
+        return self._entries
+
+    def _ticker_lock(self, ticker):
+        with self._lock:
+            return self._ticker_locks.setdefault(ticker, threading.Lock())
+
+    def _state(self, ticker, fields, now):
+        """'missing', 'stale' or 'fresh' for the requested fields."""
+        with self._lock:
+            entry = self._load().get(ticker)
+            if entry is None or any(field not in entry['fetched'] for field in fields):
+                return 'missing'
+            missing = entry.get('missing', {})
+            for field in fields:
+                ttl = self.ttls.get(field)
+                if entry['values'].get(field) is None or field in missing:
+                    # Not reported last time: ask again later, even for identity fields
+                    ttl = MISSING_RETRY if ttl is None else min(ttl, MISSING_RETRY)
+                if ttl is not None and now - entry['fetched'][field] > ttl:
+                    return 'stale'
+            return 'fresh'
+
+    def refresh(self, ticker):
+        """Fetch .info for ticker and store every tracked field."""
+        ticker = ticker.upper()
+        self.fetches += 1
+        info = self.fetch(ticker) or {}
+        now = time.time()
+        with self._lock:
+            entries = self._load()
+            entry = entries.setdefault(ticker, {'values': {}, 'fetched': {}})
+            missing = entry.setdefault('missing', {})
+            for field in self.ttls:
+                value = info.get(field)
+                if value is not None:
+                    missing.pop(field, None)
+                elif entry['values'].get(field) is not None:
+                    # Keep the last known value for a while; it is retried after MISSING_RETRY
+                    since = missing.setdefault(field, now)
+                    if now - since <= MISSING_KEEP:
+                        value = entry['values'][field]
+                    else:
+                        missing.pop(field)
+                entry['values'][field] = value
+                entry['fetched'][field] = now
+            wj.save_to_json(entries, self.path)
+
+    def _refresh_in_background(self, ticker):
+        with self._lock:
+            if ticker in self._refreshing:
+                return
+            self._refreshing.add(ticker)
+
+        def run():
+            try:
+                self.refresh(ticker)
+            except Exception as e:
+                print(f"[WARN] Background fundamentals refresh failed for {ticker}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(ticker)
+
+        threading.Thread(target=run, name=f"fundamentals-{ticker}", daemon=True).start()
+
+    def get_info(self, ticker, fields=None):
+        """
+        Cached subset of yf.Ticker(ticker).info for fields (all tracked
+        fields by default). Fields yfinance does not report are left out,
+        so callers can keep using info.get(field, default).
+        """
+        ticker = ticker.upper()
+        fields = tuple(fields or self.ttls)
+        state = self._state(ticker, fields, time.time())
+        if state == 'missing':
+            with self._ticker_lock(ticker):
+                # Another thread may have fetched it while we waited
+                if self._state(ticker, fields, time.time()) == 'missing':
+                    self.refresh(ticker)
+        with self._lock:
+            values = self._load()[ticker]['values']
+            info = {field: values[field] for field in fields if values.get(field) is not None}
+        if state == 'stale':
+            self._refresh_in_background(ticker)
+        return info
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+def get_fundamentals_cache():
+    """Process-wide FundamentalsCache backed by yfinance."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = FundamentalsCache()
+        return _default_cache
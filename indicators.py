@@ -0,0 +1,311 @@
+import bisect
+import math
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+
+NAN = float('nan')
+MA_WINDOWS = (20, 50, 200)
+BB_WINDOW = 20
+RSI_WINDOW = 14
+WINDOW_DAYS = 365  # same range as period="1y" in price_cache
+MONTH_BARS = 22
+YEAR_BARS = 252
+
+
+def _year(date):
+    return int(str(date)[:4])
+
+
+class RollingSum:
+    """Sum of the last `size` values pushed, O(1) per push/replace."""
+    def __init__(self, size):
+        self.size = size
+        self.total = 0.0
+
+    def push(self, value, leaving):
+        # leaving: the value dropping out of the window (None while filling)
+        self.total += value - (leaving or 0.0)
+
+    def replace_last(self, old, new):
+        self.total += new - old
+
+    def mean(self, count):
+        return self.total / self.size if count >= self.size else NAN
+
+
+class RollingVariance:
+    """Sliding-window Welford: sample variance (ddof=1) of the last `size` values."""
+    def __init__(self, size):
+        self.size = size
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def push(self, value, leaving):
+        if leaving is None:
+            self.count += 1
+            delta = value - self.mean
+            self.mean += delta / self.count
+            self.m2 += delta * (value - self.mean)
+        else:
+            self.replace(leaving, value)
+
+    def replace(self, old, new):
+        """Swap one value of the (full or partial) window for another."""
+        old_mean = self.mean
+        self.mean += (new - old) / self.count
+        self.m2 += (new - old) * (new - self.mean + old - old_mean)
+        if self.m2 < 0:
+            self.m2 = 0.0
+
+    def std(self, count):
+        if count < self.size or self.count < 2:
+            return NAN
+        return math.sqrt(self.m2 / (self.count - 1))
+
+
+class IndicatorState:
+    """
+    Rolling indicator state for one ticker, fed one daily bar at a time.
+    Reproduces CompanyAnalyzer's pandas indicators (rolling means, ddof=1
+    standard deviation, rolling-mean RSI) over the bars of the last
+    WINDOW_DAYS days, without recomputing the whole history.
+    """
+    def __init__(self, window_days=WINDOW_DAYS):
+        self.window = timedelta(days=window_days)
+        self.span = max(MA_WINDOWS + (BB_WINDOW, RSI_WINDOW))
+        self.bars = deque()                      # (date, close, volume) within the date window
+        self.closes = deque(maxlen=self.span + 1)  # last closes of the stream
+        self.gains = deque(maxlen=RSI_WINDOW + 1)
+        self.ma = {size: RollingSum(size) for size in MA_WINDOWS}
+        self.bb = RollingVariance(BB_WINDOW)
+        self.gain_sum = RollingSum(RSI_WINDOW)
+        self.loss_sum = RollingSum(RSI_WINDOW)
+        # Monotonic deques of (date, close) for the window max/min
+        self.highs = deque()
+        self.lows = deque()
+        self.year_start = None                   # (year, close) of the first bar of its year
+
+    @property
+    def last_date(self):
+        return self.bars[-1][0] if self.bars else None
+
+    def _leaving(self, size):
+        # Value pushed `size` bars ago, which drops out of a window of that size
+        return self.closes[-size - 1] if len(self.closes) > size else None
+
+    def _push_extremes(self, date, close):
+        while self.highs and self.highs[-1][1] <= close:
+            self.highs.pop()
+        self.highs.append((date, close))
+        while self.lows and self.lows[-1][1] >= close:
+            self.lows.pop()
+        self.lows.append((date, close))
+
+    def _rebuild_extremes(self):
+        self.highs.clear()
+        self.lows.clear()
+        for date, close, _ in self.bars:
+            self._push_extremes(date, close)
+
+    def _evict(self, last_date):
+        cutoff = last_date - self.window
+        while self.bars and self.bars[0][0] < cutoff:
+            self.bars.popleft()
+        while self.highs and self.highs[0][0] < cutoff:
+            self.highs.popleft()
+        while self.lows and self.lows[0][0] < cutoff:
+            self.lows.popleft()
+
+    def update(self, date, close, volume):
+        """Add a new bar, or revise the last one if it has the same date."""
+        close = float(close)
+        if self.bars and date == self.bars[-1][0]:
+            self._replace_last(close, volume)
+            return
+        previous = self.closes[-1] if self.closes else None
+        # First bar of the stream has no delta: counted as 0 like delta.where(...) in pandas
+        delta = close - previous if previous is not None else 0.0
+        self.closes.append(close)
+        for size, rolling in self.ma.items():
+            rolling.push(close, self._leaving(size))
+        self.bb.push(close, self._leaving(BB_WINDOW))
+        self.gains.append(delta)
+        leaving_delta = self.gains[0] if len(self.gains) > RSI_WINDOW else None
+        self.gain_sum.push(max(delta, 0.0), None if leaving_delta is None else max(leaving_delta, 0.0))
+        self.loss_sum.push(max(-delta, 0.0), None if leaving_delta is None else max(-leaving_delta, 0.0))
+        if self.year_start is None or self.year_start[0] != _year(date):
+            self.year_start = (_year(date), close)
+        self.bars.append((date, close, volume))
+        self._push_extremes(date, close)
+        self._evict(date)
+
+    def _replace_last(self, close, volume):
+        date, old, _ = self.bars[-1]
+        self.bars[-1] = (date, close, volume)
+        self.closes[-1] = close
+        for rolling in self.ma.values():
+            rolling.replace_last(old, close)
+        self.bb.replace(old, close)
+        old_delta = self.gains[-1]
+        new_delta = old_delta + close - old if len(self.closes) > 1 else 0.0
+        self.gains[-1] = new_delta
+        self.gain_sum.replace_last(max(old_delta, 0.0), max(new_delta, 0.0))
+        self.loss_sum.replace_last(max(-old_delta, 0.0), max(-new_delta, 0.0))
+        if len(self.bars) == 1 or _year(self.bars[-2][0]) != _year(date):
+            # The revised bar is the first of its year
+            self.year_start = (_year(date), close)
+        # Bars dominated by the old close may matter again: rebuild max/min
+        # from the window (only on revisions, new bars stay O(1) amortized)
+        self._rebuild_extremes()
+
+    def _rsi(self, count):
+        if count < RSI_WINDOW:
+            return NAN
+        gain = self.gain_sum.total / RSI_WINDOW
+        loss = self.loss_sum.total / RSI_WINDOW
+        if loss == 0:
+            return 100.0 if gain > 0 else NAN
+        return 100 - (100 / (1 + gain / loss))
+
+    def snapshot(self):
+        """Latest indicator values, same keys as CompanyAnalyzer.get_technical_analysis."""
+        if not self.bars:
+            return None
+        count = len(self.bars)
+        date, close, volume = self.bars[-1]
+        year_start = self.year_start[1] if self.year_start and self.year_start[0] == datetime.now().year else self.bars[0][1]
+        month_ago = self.bars[-MONTH_BARS][1] if count >= MONTH_BARS else self.bars[0][1]
+        year_ago = self.bars[-YEAR_BARS][1] if count >= YEAR_BARS else self.bars[0][1]
+        ma_20 = self.ma[20].mean(count)
+        std_20 = self.bb.std(count)
+        high = self.highs[0][1]
+        low = self.lows[0][1]
+        return {
+            'current_price': close,
+            'ma_20': ma_20,
+            'ma_50': self.ma[50].mean(count),
+            'ma_200': self.ma[200].mean(count),
+            'rsi': self._rsi(count),
+            'volatility': std_20,
+            'volume': volume,
+            'bb_upper': ma_20 + std_20 * 2,
+            'bb_lower': ma_20 - std_20 * 2,
+            'ytd_return': ((close - year_start) / year_start) * 100,
+            'month_return': ((close - month_ago) / month_ago) * 100,
+            'year_return': ((close - year_ago) / year_ago) * 100,
+            '52_week_high': high,
+            '52_week_low': low,
+            'distance_from_high': ((close - high) / high) * 100,
+            'distance_from_low': ((close - low) / low) * 100
+        }
+
+
+class IndicatorEngine:
+    """
+    Per-ticker IndicatorState, fed from the price cache bars. The state only
+    follows new bars, so a rewritten history (e.g. re-adjusted after a split,
+    possibly by another process sharing the cache) must rebuild it: update()
+    checks that bars it was fed before still have the same close, and the
+    cache's revision is a cheap in-process hint on top.
+    """
+    def __init__(self, window_days=WINDOW_DAYS):
+        self.window_days = window_days
+        self.states = {}
+        self.revisions = {}
+        self._lock = threading.Lock()
+
+    def reset(self, ticker):
+        with self._lock:
+            self.states.pop(ticker.upper(), None)
+            self.revisions.pop(ticker.upper(), None)
+
+    def update(self, ticker, dates, closes, volumes, revision=None):
+        """
+        Feed the bars not seen yet (and a revised last bar). Returns the snapshot.
+        A revision different from the previous call's means older bars changed.
+        """
+        key = ticker.upper()
+        with self._lock:
+            state = self.states.get(key)
+            if (state is None or (len(dates) and dates[-1] < state.last_date)
+                    or revision != self.revisions.get(key, revision)
+                    or not self._still_matches(state, dates, closes)):
+                # New ticker, history went backwards or was rewritten: start over
+                state = self.states[key] = IndicatorState(self.window_days)
+            self.revisions[key] = revision
+            last_date = state.last_date
+            # Walk back from the end to the first bar not older than the last one seen
+            start = len(dates)
+            while start > 0 and (last_date is None or dates[start - 1] >= last_date):
+                start -= 1
+            for i in range(start, len(dates)):
+                state.update(dates[i], closes[i], volumes[i])
+            return state.snapshot()
+
+    @staticmethod
+    def _still_matches(state, dates, closes):
+        """
+        True if the closes already fed are unchanged in dates/closes. Probes
+        the bar before the last one (the last may be an intraday revision)
+        and the oldest fed bar still covered by dates.
+        """
+        if len(state.bars) < 2 or not len(dates):
+            return True
+        probes = [state.bars[-2]]
+        oldest = next((bar for bar in state.bars if bar[0] >= dates[0]), None)
+        if oldest is not None:
+            probes.append(oldest)
+        for date, close, _ in probes:
+            i = bisect.bisect_left(dates, date)
+            if i < len(dates) and dates[i] == date and not math.isclose(float(closes[i]), close, rel_tol=1e-9):
+                return False
+        return True
+
+
+def pandas_indicators(hist):
+    """
+    Reference implementation: the rolling-window pandas computation
+    get_technical_analysis used before the incremental engine.
+    """
+    hist = hist.copy()
+    hist['MA_20'] = hist['Close'].rolling(window=20).mean()
+    hist['MA_50'] = hist['Close'].rolling(window=50).mean()
+    hist['MA_200'] = hist['Close'].rolling(window=200).mean()
+    # RSI
+    delta = hist['Close'].diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+    rs = gain / loss
+    hist['RSI'] = 100 - (100 / (1 + rs))
+    # Bollinger Bands
+    hist['BB_Middle'] = hist['Close'].rolling(window=20).mean()
+    bb_std = hist['Close'].rolling(window=20).std()
+    hist['BB_Upper'] = hist['BB_Middle'] + (bb_std * 2)
+    hist['BB_Lower'] = hist['BB_Middle'] - (bb_std * 2)
+    # Volatility
+    hist['Volatility'] = hist['Close'].rolling(window=20).std()
+    current = hist.iloc[-1]
+    # Performance calculations
+    ytd_start = hist.loc[hist.index >= f"{datetime.now().year}-01-01"].iloc[0] if len(hist.loc[hist.index >= f"{datetime.now().year}-01-01"]) > 0 else hist.iloc[0]
+    month_ago = hist.iloc[-22] if len(hist) >= 22 else hist.iloc[0]
+    year_ago = hist.iloc[-252] if len(hist) >= 252 else hist.iloc[0]
+    return {
+        'current_price': current['Close'],
+        'ma_20': current['MA_20'],
+        'ma_50': current['MA_50'],
+        'ma_200': current['MA_200'],
+        'rsi': current['RSI'],
+        'volatility': current['Volatility'],
+        'volume': current['Volume'],
+        'bb_upper': current['BB_Upper'],
+        'bb_lower': current['BB_Lower'],
+        'ytd_return': ((current['Close'] - ytd_start['Close']) / ytd_start['Close']) * 100,
+        'month_return': ((current['Close'] - month_ago['Close']) / month_ago['Close']) * 100,
+        'year_return': ((current['Close'] - year_ago['Close']) / year_ago['Close']) * 100,
+        '52_week_high': hist['Close'].max(),
+        '52_week_low': hist['Close'].min(),
+        'distance_from_high': ((current['Close'] - hist['Close'].max()) / hist['Close'].max()) * 100,
+        'distance_from_low': ((current['Close'] - hist['Close'].min()) / hist['Close'].min()) * 100
+    }
@@ -0,0 +1,157 @@
+import hashlib
+import re
+import threading
+from collections import Counter
+import working_wjson as wj
+from disk_cache import PersistentLRUCache
+
+POSITIVE_KEYWORDS_PATH = 'data/positive_keywords.json'
+NEGATIVE_KEYWORDS_PATH = 'data/negative_keywords.json'
+ARTICLE_CACHE_PATH = 'data/article_sentiment_cache.json'
+
+
+class KeywordMatcher:
+    """
+    Finds which keywords appear in a text using precompiled regexes.
+    Matching keeps the old `word in text` semantics (plain substrings, no
+    word boundaries), so scores are identical to the keyword-by-keyword loop.
+    """
+    max_cached_tokens = 100000
+
+    def __init__(self, keywords):
+        # dict.fromkeys drops duplicates but keeps the file order
+        unique = list(dict.fromkeys(w.lower() for w in keywords))
+        # A regex search only reports the longest keyword starting at a
+        # position; every keyword contained in it is also in the text.
+        self._contained = {word: frozenset(other for other in unique if other in word) for word in unique}
+        # A keyword without spaces always lies inside one space-separated
+        # token, so those are matched per token and memoized; keywords
+        # with spaces are searched in the full text.
+        single = [word for word in unique if ' ' not in word]
+        multi = [word for word in unique if ' ' in word]
+        self._single_regex = re.compile(self._trie_pattern(single)) if single else None
+        self._multi_regex = re.compile(self._trie_pattern(multi)) if multi else None
+        self._token_cache = {}
+
+    @staticmethod
+    def _trie_pattern(words):
+        """Build a prefix-trie regex that prefers the longest keyword."""
+        trie = {}
+        for word in words:
+            node = trie
+            for char in word:
+                node = node.setdefault(char, {})
+            node[''] = True
+
+        def build(node):
+            terminal = '' in node
+            branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+            if not branches:
+                return ''
+            if len(branches) == 1 and not terminal:
+                return branches[0]
+            pattern = '(?:' + '|'.join(branches) + ')'
+            return pattern + '?' if terminal else pattern
+
+        return build(trie)
+
+    def _scan(self, regex, text):
+        found = set()
+        search = regex.search
+        # Restart one character after each hit so overlapping keywords are seen
+        hit = search(text)
+        while hit is not None:
+            longest = hit.group()
+            if longest not in found:
+                found.update(self._contained[longest])
+            hit = search(text, hit.start() + 1)
+        return frozenset(found)
+
+    def match(self, text):
+        """Return the set of keywords found in text (already lowercased)."""
+        found = set()
+        if self._single_regex is not None:
+            cache = self._token_cache
+            if len(cache) > self.max_cached_tokens:
+                cache.clear()
+            for token in set(text.split(' ')):
+                hits = cache.get(token)
+                if hits is None:
+                    hits = cache[token] = self._scan(self._single_regex, token)
+                if hits:
+                    found.update(hits)
+        if self._multi_regex is not None:
+            found.update(self._scan(self._multi_regex, text))
+        return found
+
+
+class SentimentMatcher:
+    """Positive and negative keyword lists matched together in one pass."""
+    def __init__(self, positive, negative):
+        self.positive = [w.lower() for w in positive]
+        self.negative = [w.lower() for w in negative]
+        self._matcher = KeywordMatcher(self.positive + self.negative)
+        self._positive_count = Counter(self.positive)
+        self._negative_count = Counter(self.negative)
+        # Changes whenever the keyword lists change (used to key cached scores)
+        self.version = hashlib.sha1(repr((self.positive, self.negative)).encode('utf-8')).hexdigest()[:12]
+
+    def analyze(self, text):
+        """
+        Return (positive_score, negative_score, matched_pos, matched_neg) for a
+        lowercased text, with the same counts as `sum(1 for word in keywords if word in text)`.
+        """
+        found = self._matcher.match(text)
+        matched_pos = [word for word in found if word in self._positive_count]
+        matched_neg = [word for word in found if word in self._negative_count]
+        positive_score = sum(self._positive_count[word] for word in matched_pos)
+        negative_score = sum(self._negative_count[word] for word in matched_neg)
+        return positive_score, negative_score, matched_pos, matched_neg
+
+
+_matcher = None
+_matcher_version = None
+_matcher_lock = threading.Lock()
+
+def get_sentiment_matcher():
+    """
+    Return the shared SentimentMatcher for the keyword files.
+    It is rebuilt only when one of the files changes on disk.
+    """
+    global _matcher, _matcher_version
+    file_versions = (wj.file_version(POSITIVE_KEYWORDS_PATH), wj.file_version(NEGATIVE_KEYWORDS_PATH))
+    with _matcher_lock:
+        if _matcher is None or _matcher_version != file_versions:
+            _matcher = SentimentMatcher(
+                wj.load_from_json(POSITIVE_KEYWORDS_PATH),
+                wj.load_from_json(NEGATIVE_KEYWORDS_PATH)
+            )
+            _matcher_version = file_versions
+        return _matcher
+
+
+_article_cache = None
+
+def get_article_cache():
+    """Shared per-article score cache, persisted between runs."""
+    global _article_cache
+    with _matcher_lock:
+        if _article_cache is None:
+            _article_cache = PersistentLRUCache(ARTICLE_CACHE_PATH, max_entries=20000)
+        return _article_cache
+
+def score_text(text, matcher=None):
+    """
+    Memoized SentimentMatcher.analyze keyed by a hash of the text and the
+    keyword-set version. Matched keyword lists are None on a cache hit.
+    """
+    if matcher is None:
+        matcher = get_sentiment_matcher()
+    cache = get_article_cache()
+    key = hashlib.sha1((matcher.version + '\0' + text).encode('utf-8')).hexdigest()
+    cached = cache.get(key)
+    if cached is not None:
+        return cached[0], cached[1], None, None
+    positive_score, negative_score, matched_pos, matched_neg = matcher.analyze(text)
+    cache.put(key, [positive_score, negative_score])
+    return positive_score, negative_score, matched_pos, matched_neg
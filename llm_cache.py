@@ -0,0 +1,27 @@
+import hashlib
+import threading
+from disk_cache import PersistentLRUCache
+
+LLM_CACHE_PATH = 'data/llm_response_cache.json'
+LLM_CACHE_MAX_ENTRIES = 50000
+
+_llm_cache = None
+_llm_cache_lock = threading.Lock()
+
+
+def normalize_text(text):
+    """Collapse whitespace and case so trivially different copies share a key."""
+    return ' '.join(str(text).split()).casefold()
+
+def make_key(model, template_version, text):
+    """Cache key for a prompt built from `text` with a given template version."""
+    raw = f"{model}\0{template_version}\0{normalize_text(text)}"
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+def get_llm_cache():
+    """Shared LLM response cache, persisted between runs."""
+    global _llm_cache
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            _llm_cache = PersistentLRUCache(LLM_CACHE_PATH, max_entries=LLM_CACHE_MAX_ENTRIES)
+        return _llm_cache
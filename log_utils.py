@@ -0,0 +1,35 @@
+import logging
+import os
+import time
+from contextlib import contextmanager
+
+# XBOT_LOG_LEVEL=DEBUG brings back the per-article output of the hot paths.
+# XBOT_TIMINGS=1 logs one timing summary per call instead.
+LOG_LEVEL = os.getenv('XBOT_LOG_LEVEL', 'INFO')
+TIMINGS = os.getenv('XBOT_TIMINGS', '0') == '1'
+
+LOG_FORMAT = '%(asctime)s %(levelname)s %(name)s: %(message)s'
+
+
+def setup_logging(level=None):
+    """Configure the root logger once (call from entry points only)."""
+    logging.basicConfig(level=(level or LOG_LEVEL).upper(), format=LOG_FORMAT)
+
+
+@contextmanager
+def timed(logger, label):
+    """
+    Log how long the block took when timings are enabled.
+    The yielded dict can be filled with counts shown in the summary.
+    """
+    details = {}
+    if not TIMINGS:
+        yield details
+        return
+    start = time.perf_counter()
+    try:
+        yield details
+    finally:
+        elapsed = (time.perf_counter() - start) * 1000
+        extra = ' '.join(f"{key}={value}" for key, value in details.items())
+        logger.info("[TIMING] %s took %.1f ms %s", label, elapsed, extra)
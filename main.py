@@ -5,9 +5,14 @@ import sentiment_analytics
 import news
 import politics 
 import datetime 
+import threading
+import log_utils
 
 
 def main():
+    log_utils.setup_logging()
+    # load the LLM backends in the background while the news is being fetched
+    threading.Thread(target=politics.warm_up, name="llm-warm-up", daemon=True).start()
     # Initialize news extractor
     news_extractor= news.NewsExtractor()
     # update each news file (yf_news, google_news, x_tweets)
@@ -15,8 +20,8 @@ def main():
 
     # Initialize company analyzer
     company_a=company_analyzer.CompanyAnalyzer()
-    # update each news file data_total_analyze_file
-    company_a.get_multi_source_sentiment_analysis()
+    # update each news file data_total_analyze_file (one batch pass over all companies)
+    company_a.get_multi_source_sentiment_analysis(list(company_a.companies.keys()))
 
    
     # update uncertity_per_company and politics news(it will take a while so go back to sleep jaja)
@@ -28,9 +33,11 @@ def main():
     analytics.calculate_combined_sentiment_metrics()
 
     #now run bot for post completed updated analysis
+    # refresh price history of every ticker in one batched download first
+    company_a.get_technical_analysis_batch(list(company_a.companies.values()))
     #analysis of all companies saved in the class CompanyAnalyzer
-    for i in company_a.companies.keys():
-        company_analyzer.post_company_analysis(i)
+    for i, ticker in company_a.companies.items():
+        company_analyzer.post_company_analysis(i, ticker)
     
  
 
@@ -0,0 +1,144 @@
+import os
+import queue
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from rate_limit import TokenBucket
+
+LOCKFILE = "mention_bot.lock"
+# Shortest wait after a 429 when posting, whatever X-Rate-Limit-Reset says
+RATE_LIMIT_MIN_WAIT = 30
+
+
+# Simple file lock context manager (cross-platform, works for single machine)
+@contextmanager
+def file_lock(lockfile=LOCKFILE, timeout=30):
+    start = time.time()
+    while True:
+        try:
+            # Try to create the lock file exclusively
+            fd = os.open(lockfile, os.O_CREAT | os.O_EXCL | os.O_RDWR)
+            os.close(fd)
+            break
+        except FileExistsError:
+            if time.time() - start > timeout:
+                raise TimeoutError(f"Timeout waiting for lock {lockfile}")
+            time.sleep(0.2)
+    try:
+        yield
+    finally:
+        try:
+            os.remove(lockfile)
+        except Exception:
+            pass
+
+
+class MentionJob:
+    """One accepted mention waiting to be analyzed and answered."""
+    def __init__(self, mention, username, text, company_ticker, authorized, market_open):
+        self.mention = mention
+        self.username = username
+        self.text = text
+        self.company_ticker = company_ticker
+        self.authorized = authorized
+        self.market_open = market_open
+
+
+class MentionPipeline:
+    """
+    Mention handling split in three stages connected by queues:
+    intake (the scan loop calls submit), analysis (a pool of workers, one
+    ticker at a time per worker so different tickers run concurrently) and
+    posting (a single poster paced by a token bucket instead of a fixed
+    sleep after every reply).
+    """
+    def __init__(self, twitter_client, analysis_workers=4, post_interval=55, lockfile=LOCKFILE):
+        self.twitter_client = twitter_client
+        self.analysis_workers = analysis_workers
+        self.lockfile = lockfile
+        self.analysis_queue = queue.Queue()
+        self.post_queue = queue.Queue()
+        # One reply every post_interval seconds on average (X API rate limits)
+        self.post_limiter = TokenBucket(rate=1.0 / post_interval, capacity=1)
+        self._ticker_locks = {}
+        self._ticker_locks_guard = threading.Lock()
+        self._threads = []
+
+    def start(self):
+        """Start the analysis workers and the poster (idempotent)."""
+        if self._threads:
+            return
+        for i in range(self.analysis_workers):
+            self._threads.append(threading.Thread(target=self._analysis_worker, name=f"mention-analysis-{i}", daemon=True))
+        self._threads.append(threading.Thread(target=self._poster, name="mention-poster", daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, job):
+        self.analysis_queue.put(job)
+
+    def pending(self):
+        return self.analysis_queue.unfinished_tasks + self.post_queue.unfinished_tasks
+
+    def _ticker_lock(self, ticker):
+        with self._ticker_locks_guard:
+            return self._ticker_locks.setdefault(ticker.upper(), threading.Lock())
+
+    def _analysis_worker(self):
+        while True:
+            job = self.analysis_queue.get()
+            try:
+                # Mentions of the same ticker are analyzed one after another
+                with self._ticker_lock(job.company_ticker):
+                    response_text, log_msg = self.twitter_client.get_mention_response(
+                        market_open=job.market_open,
+                        authorized=job.authorized,
+                        company_ticker=job.company_ticker,
+                        mention=job.mention,
+                        username=job.username,
+                        text=job.text
+                    )
+                if response_text:
+                    self.post_queue.put((job, response_text, log_msg))
+                else:
+                    print(f"[SKIP] No response for @{job.username} ({job.company_ticker}). Log: {log_msg}")
+            except Exception as e:
+                print(f"[ERROR] Could not process mention for @{job.username}: {e}")
+                print(f"[DEBUG] Full error traceback: {traceback.format_exc()}")
+            finally:
+                self.analysis_queue.task_done()
+
+    def _poster(self):
+        while True:
+            job, response_text, log_msg = self.post_queue.get()
+            try:
+                self.post_limiter.acquire()
+                with file_lock(self.lockfile):
+                    print(f"[DEBUG] About to post response for @{job.username}: {response_text}")
+                    self.twitter_client.client.create_tweet(in_reply_to_tweet_id=job.mention.id, text=response_text)
+                    print(log_msg)
+            except Exception as e:
+                reset_time = _rate_limit_reset(e)
+                if reset_time is not None:
+                    # Same handling as the scan loop: wait for X-Rate-Limit-Reset, then retry
+                    wait_time = max(RATE_LIMIT_MIN_WAIT, reset_time - int(time.time()))
+                    print(f"[429] Rate limit alcanzado al publicar. Esperando {wait_time} segundos antes de reintentar.")
+                    time.sleep(wait_time)
+                    self.post_queue.put((job, response_text, log_msg))
+                else:
+                    print(f"[ERROR] Could not post reply for @{job.username}: {e}")
+                    print(f"[DEBUG] Full error traceback: {traceback.format_exc()}")
+            finally:
+                self.post_queue.task_done()
+
+
+def _rate_limit_reset(error):
+    """Return the x-rate-limit-reset epoch of a 429 API error, else None."""
+    response = getattr(error, 'response', None)
+    if response is None or getattr(response, 'status_code', None) != 429:
+        return None
+    try:
+        return int(response.headers.get('x-rate-limit-reset'))
+    except (TypeError, ValueError):
+        return int(time.time()) + 900  # fallback 15 min
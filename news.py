@@ -7,10 +7,16 @@ import yfinance as yf
 import twitter_client as tc
 import working_wjson as wj
 import dateutil.parser  # For parsing various date formats
+from concurrent.futures import ThreadPoolExecutor
+from rate_limit import TokenBucket
 
+# Per-provider limits for save_news: parallel requests and requests/second
+PROVIDER_LIMITS = {
+    'yahoo': {'concurrency': 4, 'rate': 4.0, 'burst': 4},
+    'google': {'concurrency': 2, 'rate': 1.0, 'burst': 2},
+}
 
 
-import json
 
 class NewsExtractor:
     def __init__(self, lang='en', country='US'):
@@ -21,6 +27,11 @@ class NewsExtractor:
         #initialize copany_analyzer
         self.companies = wj.load_from_json('data/companies.json')
         self.queries= wj.load_from_json('data/queries_x.json')
+        # Shared by every fetch made through this extractor
+        self.rate_limiters = {
+            provider: TokenBucket(limits['rate'], limits['burst'])
+            for provider, limits in PROVIDER_LIMITS.items()
+        }
          
     def clean_text(self, text):
         """Clean HTML tags and noise from text"""
@@ -192,22 +203,50 @@ class NewsExtractor:
         standard_query = f"{company_name} OR {ticker} -is:retweet -is:reply -discount -sale lang:en"
         return standard_query
 
+    def _fetch_limited(self, provider, fetch, arg):
+        """Call fetch(arg) once the provider's token bucket allows it."""
+        self.rate_limiters[provider].acquire()
+        return fetch(arg)
+
     def save_news(self):
-        import time
+        """
+        Fetch Yahoo Finance and Google News for every company concurrently.
+        Each provider gets its own worker pool (its concurrency limit) and
+        token bucket, so wall time follows the slowest provider instead of
+        the sum of all requests.
+        """
+        companies = list(self.companies.items())
+        yf_futures = {}
+        g_futures = {}
+        yf_pool = ThreadPoolExecutor(max_workers=PROVIDER_LIMITS['yahoo']['concurrency'])
+        g_pool = ThreadPoolExecutor(max_workers=PROVIDER_LIMITS['google']['concurrency'])
+        with yf_pool, g_pool:
+            for company_name, ticker in companies:
+                print(f"[PIPELINE] Processing: {company_name} (Ticker: {ticker})")
+                yf_futures[company_name] = yf_pool.submit(self._fetch_limited, 'yahoo', self.yf_news, ticker)
+                # Google News (use company name as topic, like test script)
+                g_futures[company_name] = g_pool.submit(self._fetch_limited, 'google', self.search_news_google, company_name)
         yf_all_company = {}
         x_all_company = {}
         g_search_all_company = {}
-        for company_name, ticker in self.companies.items():
-            print(f"[PIPELINE] Processing: {company_name} (Ticker: {ticker})")
+        # Build the output in companies.json order regardless of completion order
+        for company_name, ticker in companies:
             # Yahoo Finance
-            yf = self.yf_news(ticker)
+            try:
+                yf = yf_futures[company_name].result()
+            except Exception as e:
+                print(f"[ERROR] Yahoo Finance fetch failed for {company_name}: {e}")
+                yf = None
             print(f"[PIPELINE] Yahoo Finance: {len(yf) if yf else 0} articles for {company_name}")
             if yf is not None and yf != {}:
                 yf_all_company[company_name] = yf
             else:
                 yf_all_company[company_name] = {}  # Always include the key
-            # Google News (use company name as topic, like test script)
-            g_search = self.search_news_google(company_name)
+            try:
+                g_search = g_futures[company_name].result()
+            except Exception as e:
+                print(f"[ERROR] Google News fetch failed for {company_name}: {e}")
+                g_search = None
             if g_search is not None and g_search != {}:
                 print(f"[PIPELINE] Google News: {len(g_search)} articles for topic '{company_name}'")
                 g_search_all_company[company_name] = g_search
@@ -220,46 +259,32 @@ class NewsExtractor:
             print(f"[PIPELINE] X/Twitter: Tweet search disabled for query '{x_query}'")
             x = {}
             x_all_company[company_name] = x  # Always include the key
-            time.sleep(1)  # avoid rate limits
         wj.save_to_json(yf_all_company, 'data/yf_news.json')
         wj.save_to_json(x_all_company, 'data/x_tweets.json')
         wj.save_to_json(g_search_all_company, 'data/google_news.json')
         # Post-save verification
         print("[DEBUG] Post-save verification:")
         for fname in ['data/yf_news.json', 'data/x_tweets.json', 'data/google_news.json']:
-            try:
-                with open(fname, 'r') as f:
-                    data = json.load(f)
-                print(f"[DEBUG] {fname} contains {len(data) if isinstance(data, dict) else 'non-dict'} items after save_news.")
-            except Exception as e:
-                print(f"[DEBUG] Error reading {fname} after save: {e}")
+            print(f"[DEBUG] {fname} contains {len(wj.get_store(fname).keys())} items after save_news.")
     
     def save_single_company_news(self,company_name):
-        yf_all_companies=wj.load_from_json('data/yf_news.json')
-        x_all_companies=wj.load_from_json('data/x_tweets.json')
-        g_all_companies=wj.load_from_json('data/google_news.json')
-
+        """Fetch news for one company and update only its entries in the news stores."""
         yf=self.yf_news(self.companies[company_name])
         if yf is not None and yf != {}:
-            yf_all_companies[company_name]=yf
+            wj.get_store('data/yf_news.json').put(company_name, yf)
         # X API usage for tweet search is disabled for minimal API usage
         x = {}
         g_search=self.search_news_google(company_name)
         if g_search is not None and g_search != {}:
-            g_all_companies[company_name]=g_search
-        #save updates
-        wj.save_to_json(yf_all_companies,'data/yf_news.json')
-        wj.save_to_json(x_all_companies,'data/x_tweets.json')
-        wj.save_to_json(g_all_companies,'data/google_news.json')
-        # Post-save verification
+            wj.get_store('data/google_news.json').put(company_name, g_search)
+        # Post-save verification; the stored entries are returned so callers don't reread them
         print(f"[DEBUG] Post-save verification for {company_name}:")
+        saved = {}
         for fname in ['data/yf_news.json', 'data/x_tweets.json', 'data/google_news.json']:
-            try:
-                with open(fname, 'r') as f:
-                    data = json.load(f)
-                print(f"[DEBUG] {fname} contains {len(data) if isinstance(data, dict) else 'non-dict'} items after save_single_company_news.")
-            except Exception as e:
-                print(f"[DEBUG] Error reading {fname} after save: {e}")
+            entry = wj.get_store(fname).get(company_name, {})
+            print(f"[DEBUG] {fname} has {len(entry)} items for {company_name} after save_single_company_news.")
+            saved[fname] = entry
+        return saved
 
 
 
@@ -0,0 +1,136 @@
+import asyncio
+import json
+import random
+from typing import Any, Dict, List, Optional
+import llm_cache
+from ollama_config import OLLAMA_CONFIG, default_cache_key, request_format
+
+# Attempts after the first failed one, and base of the exponential backoff (seconds)
+RETRIES = 2
+BACKOFF = 0.5
+
+
+class AsyncOllamaClient:
+    """
+    asyncio version of OllamaClient on top of aiohttp (optional dependency,
+    see llm_requirements.txt). One ClientSession is opened on first use and
+    reused by every request; at most max_concurrency requests are in flight.
+    Failed requests (connection errors, timeouts, 5xx) are retried with
+    exponential backoff and jitter. Shares the response cache format of
+    OllamaClient, so both clients can read each other's answers.
+    """
+    def __init__(self, base_url: str = OLLAMA_CONFIG["base_url"], response_cache=None, keep_alive=None,
+                 timeout: Optional[float] = None, max_concurrency: Optional[int] = None,
+                 retries: int = RETRIES, backoff: float = BACKOFF):
+        self.base_url = base_url
+        self.api_url = f"{base_url}/api"
+        self.response_cache = response_cache
+        self.keep_alive = keep_alive if keep_alive is not None else OLLAMA_CONFIG["keep_alive"]
+        self.timeout = timeout or OLLAMA_CONFIG["timeout"]
+        self.max_concurrency = max_concurrency or OLLAMA_CONFIG["num_parallel"]
+        self.retries = retries
+        self.backoff = backoff
+        self.requests = 0
+        self._session = None
+        self._semaphore = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def _get_session(self):
+        if self._session is None or self._session.closed:
+            import aiohttp
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self._session
+
+    def _get_semaphore(self):
+        # Created lazily so it belongs to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _delay(self, attempt):
+        return self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5)
+
+    async def _post(self, endpoint: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        import aiohttp
+        if self.keep_alive is not None:
+            data["keep_alive"] = self.keep_alive
+        session = self._get_session()
+        for attempt in range(self.retries + 1):
+            try:
+                async with self._get_semaphore():
+                    self.requests += 1
+                    async with session.post(f"{self.api_url}/{endpoint}", json=data) as response:
+                        if response.status == 200:
+                            return await response.json(content_type=None)
+                        if response.status < 500:
+                            # The request itself is wrong: retrying will not help
+                            print(f"[ERROR] Ollama API error: {response.status}")
+                            return None
+                        error = f"HTTP {response.status}"
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = repr(e)
+            if attempt < self.retries:
+                delay = self._delay(attempt)
+                print(f"[WARN] Ollama request failed ({error}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+        print(f"[ERROR] Ollama request failed after {self.retries + 1} attempts: {error}")
+        return None
+
+    def _cached(self, key):
+        if self.response_cache is None or key is None:
+            return None
+        return self.response_cache.get(key)
+
+    def _remember(self, key, result):
+        if self.response_cache is None or key is None or not result:
+            return
+        self.response_cache.put(key, {k: v for k, v in result.items() if k != 'context'})
+        self.response_cache.flush_if_stale()
+
+    async def generate(self, model: str, prompt: str, cache_key: Optional[str] = None,
+                       format=None, options: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """Non-streaming /api/generate, cached like OllamaClient.generate (same format/options)."""
+        if self.response_cache is not None:
+            cache_key = cache_key or default_cache_key(model, prompt, format, options)
+            cached = self._cached(cache_key)
+            if cached is not None:
+                return cached
+        data = {"model": model, "prompt": prompt, "stream": False}
+        if format is not None:
+            data["format"] = request_format(format)
+        if options:
+            data["options"] = options
+        result = await self._post("generate", data)
+        self._remember(cache_key, result)
+        return result
+
+    async def chat(self, model: str, messages: list, cache_key: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Non-streaming /api/chat, cached like OllamaClient.chat."""
+        if self.response_cache is not None:
+            cache_key = cache_key or llm_cache.make_key(model, 'chat', json.dumps(messages, sort_keys=True))
+            cached = self._cached(cache_key)
+            if cached is not None:
+                return cached
+        result = await self._post("chat", {"model": model, "messages": messages, "stream": False})
+        self._remember(cache_key, result)
+        return result
+
+    async def gather_generate(self, model: str, prompts: List[str], cache_keys: Optional[List[str]] = None,
+                              format=None, options: Optional[Dict[str, Any]] = None) -> List[Optional[Dict[str, Any]]]:
+        """generate() for every prompt concurrently. Results in order, None for failed prompts."""
+        cache_keys = cache_keys or [None] * len(prompts)
+        results = await asyncio.gather(*(self.generate(model, prompt, cache_key=key, format=format, options=options)
+                                         for prompt, key in zip(prompts, cache_keys)),
+                                       return_exceptions=True)
+        return [None if isinstance(result, BaseException) else result for result in results]
@@ -1,91 +1,254 @@
 # Configuration for Ollama integration
+import os
+import threading
+import time
 import requests
 import json
-from typing import Dict, Any, Optional
+from requests.adapters import HTTPAdapter
+from typing import Dict, Any, Iterator, Optional
+import llm_cache
+
+# Default configuration
+OLLAMA_CONFIG = {
+    "base_url": "http://localhost:11434",
+    "default_model": "llama2:7b",
+    "timeout": 60,
+    "max_tokens": 4096,
+    # Requests kept in flight by batch scorers; match the server's OLLAMA_NUM_PARALLEL
+    "num_parallel": int(os.getenv("OLLAMA_NUM_PARALLEL", "4")),
+    # How long the server keeps the model loaded after a request ("5m", "1h", -1 = forever)
+    "keep_alive": os.getenv("OLLAMA_KEEP_ALIVE", "30m"),
+    # Seconds an is_available() answer is reused before probing the server again
+    "health_ttl": float(os.getenv("OLLAMA_HEALTH_TTL", "30")),
+    # Send JSON schemas as `format` (Ollama >= 0.5); when off, schemas are sent as plain "json" mode
+    "structured_outputs": os.getenv("OLLAMA_STRUCTURED_OUTPUTS", "1") != "0",
+}
+
+
+def request_format(format):
+    """`format` value for a request: a schema dict, "json", or None."""
+    if isinstance(format, dict) and not OLLAMA_CONFIG["structured_outputs"]:
+        return "json"
+    return format
+
+
+def default_cache_key(model, prompt, format=None, options=None):
+    """Cache key of a generate request without an explicit cache_key."""
+    kind = 'prompt'
+    if format is not None or options:
+        # Constrained answers differ from free-text ones for the same prompt
+        kind += '-' + json.dumps([format, options], sort_keys=True)
+    return llm_cache.make_key(model, kind, prompt)
+
+
+def json_object_end(text: str) -> int:
+    """
+    Index just past the first complete JSON object in text, or -1 if the
+    object has not closed yet. Braces inside strings are ignored.
+    """
+    depth = 0
+    in_string = False
+    escaped = False
+    for i, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            # Quotes only open strings once the object has started
+            in_string = depth > 0
+        elif char == '{':
+            depth += 1
+        elif char == '}' and depth > 0:
+            depth -= 1
+            if depth == 0:
+                return i + 1
+    return -1
+
 
 class OllamaClient:
-    """Client for interacting with Ollama API"""
+    """
+    Client for interacting with Ollama API.
+    All calls share one requests.Session, so connections to the server are
+    pooled and kept alive instead of opening a new one per request.
+    """
     
-    def __init__(self, base_url: str = "http://localhost:11434"):
+    def __init__(self, base_url: str = "http://localhost:11434", response_cache=None,
+                 keep_alive=None, health_ttl: Optional[float] = None, pool_size: Optional[int] = None):
         self.base_url = base_url
         self.api_url = f"{base_url}/api"
+        # Optional PersistentLRUCache (see llm_cache) for non-streaming responses
+        self.response_cache = response_cache
+        self.keep_alive = keep_alive if keep_alive is not None else OLLAMA_CONFIG["keep_alive"]
+        self.health_ttl = health_ttl if health_ttl is not None else OLLAMA_CONFIG["health_ttl"]
+        self.timeout = OLLAMA_CONFIG["timeout"]
+        # One pooled connection per request the batch scorers keep in flight
+        pool_size = pool_size or OLLAMA_CONFIG["num_parallel"]
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._health = None  # (checked_at, available)
+        self._health_lock = threading.Lock()
+
+    def close(self):
+        self.session.close()
+
+    def _cached(self, key):
+        if self.response_cache is None or key is None:
+            return None
+        return self.response_cache.get(key)
+
+    def _remember(self, key, result):
+        if self.response_cache is None or key is None or not result:
+            return
+        # 'context' is the token state of the conversation: large and not needed again
+        self.response_cache.put(key, {k: v for k, v in result.items() if k != 'context'})
+        self.response_cache.flush_if_stale()
+
+    def _set_health(self, available: bool):
+        with self._health_lock:
+            self._health = (time.monotonic(), available)
+
+    def _payload(self, format=None, options=None, **data):
+        if self.keep_alive is not None:
+            data["keep_alive"] = self.keep_alive
+        if format is not None:
+            data["format"] = request_format(format)
+        if options:
+            data["options"] = options
+        return data
         
-    def is_available(self) -> bool:
-        """Check if Ollama server is running"""
+    def is_available(self, refresh: bool = False) -> bool:
+        """Check if Ollama server is running (answer reused for health_ttl seconds)"""
+        with self._health_lock:
+            if not refresh and self._health is not None and time.monotonic() - self._health[0] < self.health_ttl:
+                return self._health[1]
         try:
-            response = requests.get(f"{self.base_url}/api/tags", timeout=5)
-            return response.status_code == 200
+            response = self.session.get(f"{self.base_url}/api/tags", timeout=5)
+            available = response.status_code == 200
         except requests.exceptions.RequestException:
-            return False
+            available = False
+        self._set_health(available)
+        return available
     
     def list_models(self) -> list:
         """List available models"""
         try:
-            response = requests.get(f"{self.api_url}/tags")
+            response = self.session.get(f"{self.api_url}/tags", timeout=self.timeout)
             if response.status_code == 200:
                 data = response.json()
                 return [model['name'] for model in data.get('models', [])]
             return []
         except requests.exceptions.RequestException:
             return []
-    
-    def generate(self, model: str, prompt: str, stream: bool = False) -> Optional[Dict[str, Any]]:
-        """Generate response from Ollama model"""
+
+    def _post(self, endpoint: str, data: Dict[str, Any], label: str) -> Optional[Dict[str, Any]]:
         try:
-            data = {
-                "model": model,
-                "prompt": prompt,
-                "stream": stream
-            }
-            
-            response = requests.post(
-                f"{self.api_url}/generate",
-                json=data,
-                timeout=60  # 60 second timeout
-            )
-            
-            if response.status_code == 200:
-                return response.json()
-            else:
-                print(f"Ollama API error: {response.status_code}")
-                return None
-                
+            response = self.session.post(f"{self.api_url}/{endpoint}", json=data, timeout=self.timeout)
         except requests.exceptions.RequestException as e:
-            print(f"Error connecting to Ollama: {e}")
+            print(f"Error connecting to {label}: {e}")
+            # Let the next is_available() probe the server again
+            self._set_health(False)
             return None
+        if response.status_code == 200:
+            return response.json()
+        print(f"{label} API error: {response.status_code}")
+        return None
     
-    def chat(self, model: str, messages: list, stream: bool = False) -> Optional[Dict[str, Any]]:
-        """Chat with Ollama model"""
+    def generate(self, model: str, prompt: str, stream: bool = False, cache_key: Optional[str] = None,
+                 format=None, options: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Generate response from Ollama model.
+        With a response cache, cache_key (llm_cache.make_key) identifies the
+        request; by default the key is built from the whole prompt.
+        format ("json" or a JSON schema) constrains the answer; options are
+        model options such as {"num_predict": 160}.
+        Use stream_generate/generate_json to read the answer as it is produced.
+        """
+        if not stream and self.response_cache is not None:
+            cache_key = cache_key or default_cache_key(model, prompt, format, options)
+            cached = self._cached(cache_key)
+            if cached is not None:
+                return cached
+        data = self._payload(model=model, prompt=prompt, stream=stream, format=format, options=options)
+        result = self._post("generate", data, "Ollama")
+        if result is not None and not stream:
+            self._remember(cache_key, result)
+        return result
+
+    def stream_generate(self, model: str, prompt: str, format=None, options: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+        """
+        Yield the answer of the model chunk by chunk. Closing the generator
+        early (break, .close()) drops the connection, which makes the server
+        stop generating.
+        """
+        data = self._payload(model=model, prompt=prompt, stream=True, format=format, options=options)
         try:
-            data = {
-                "model": model,
-                "messages": messages,
-                "stream": stream
-            }
-            
-            response = requests.post(
-                f"{self.api_url}/chat",
-                json=data,
-                timeout=60
-            )
-            
-            if response.status_code == 200:
-                return response.json()
-            else:
-                print(f"Ollama Chat API error: {response.status_code}")
-                return None
-                
+            response = self.session.post(f"{self.api_url}/generate", json=data, timeout=self.timeout, stream=True)
         except requests.exceptions.RequestException as e:
-            print(f"Error connecting to Ollama Chat: {e}")
-            return None
+            print(f"Error connecting to Ollama: {e}")
+            self._set_health(False)
+            return
+        with response:
+            if response.status_code != 200:
+                print(f"Ollama API error: {response.status_code}")
+                return
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if chunk.get('response'):
+                    yield chunk['response']
+                if chunk.get('done'):
+                    return
 
-# Default configuration
-OLLAMA_CONFIG = {
-    "base_url": "http://localhost:11434",
-    "default_model": "llama2:7b",
-    "timeout": 60,
-    "max_tokens": 4096
-}
+    def generate_json(self, model: str, prompt: str, cache_key: Optional[str] = None,
+                      format=None, options: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        generate() for prompts that answer with a JSON object: the answer is
+        streamed and reading stops as soon as the first object closes, so
+        whatever the model would ramble afterwards is never generated.
+        Returns {'response': text, 'done': bool} like generate (cached the same way).
+        """
+        if self.response_cache is not None:
+            cache_key = cache_key or default_cache_key(model, prompt, format, options)
+            cached = self._cached(cache_key)
+            if cached is not None:
+                return cached
+        text = ''
+        done = True
+        chunks = self.stream_generate(model, prompt, format=format, options=options)
+        try:
+            for chunk in chunks:
+                text += chunk
+                end = json_object_end(text)
+                if end != -1:
+                    text = text[:end]
+                    done = False
+                    break
+        finally:
+            chunks.close()
+        if not text:
+            return None
+        result = {'response': text, 'done': done}
+        self._remember(cache_key, result)
+        return result
+    
+    def chat(self, model: str, messages: list, stream: bool = False, cache_key: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Chat with Ollama model (cached like generate)"""
+        if not stream and self.response_cache is not None:
+            cache_key = cache_key or llm_cache.make_key(model, 'chat', json.dumps(messages, sort_keys=True))
+            cached = self._cached(cache_key)
+            if cached is not None:
+                return cached
+        result = self._post("chat", self._payload(model=model, messages=messages, stream=stream), "Ollama Chat")
+        if result is not None and not stream:
+            self._remember(cache_key, result)
+        return result
 
 def test_ollama_connection():
     """Test Ollama connection and print status"""
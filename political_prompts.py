@@ -0,0 +1,274 @@
+import json
+import re
+import threading
+
+# Bump when the batch prompt changes, so cached batch scores are not reused
+POLITIC_BATCH_PROMPT_VERSION = 'batch-v2'
+
+# JSON schema passed as Ollama's `format` for politic_uncertity answers
+UNCERTAINTY_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'political_uncertainty_score': {'type': 'integer', 'minimum': 1, 'maximum': 10},
+        'justification': {'type': 'string'},
+    },
+    'required': ['political_uncertainty_score', 'justification'],
+}
+# Token cap for that answer: the score plus a short justification
+UNCERTAINTY_NUM_PREDICT = 160
+# Batch answers are one object holding the array, so "json" format mode can produce them too
+BATCH_KEY = 'articles'
+
+LEVELS = ('low', 'medium', 'high')
+# Fields of each _analyze_with_ollama answer: allowed values, 'list' (of strings) or 'confidence' (0.0-1.0)
+ANALYSIS_FIELDS = {
+    'political_sentiment': {
+        'political_sentiment': ('positive', 'negative', 'neutral'),
+        'uncertainty_level': LEVELS,
+        'confidence_score': 'confidence',
+        'key_political_topics': 'list',
+    },
+    'risk_assessment': {
+        'risk_level': LEVELS,
+        'business_impact': ('minimal', 'moderate', 'significant'),
+        'confidence_score': 'confidence',
+        'risk_factors': 'list',
+    },
+    'impact_analysis': {
+        'impact_level': LEVELS,
+        'affected_sectors': 'list',
+        'confidence_score': 'confidence',
+        'time_horizon': ('short-term', 'medium-term', 'long-term'),
+    },
+}
+ANALYSIS_FIELDS['combined'] = {field: kind for fields in ANALYSIS_FIELDS.values() for field, kind in fields.items()}
+# Token caps sized to the number of fields of each answer
+ANALYSIS_NUM_PREDICT = {'political_sentiment': 160, 'risk_assessment': 160, 'impact_analysis': 160, 'combined': 320}
+
+_ARRAY_START = re.compile(r'\[\s*\{')
+# Where the answer for one article starts: "id": 3  /  [3]  /  3.  /  3)
+_ITEM_MARKER = re.compile(r'(?m)"id"\s*:\s*(\d+)|^\s*\[?(\d+)[\].):]')
+
+
+def build_batch_prompt(summaries):
+    """One prompt scoring several article summaries, answered as a JSON array."""
+    articles = '\n'.join(f"[{i}] {' '.join(str(summary).split())}" for i, summary in enumerate(summaries, 1))
+    return f"""
+        Analyze each of the following {len(summaries)} news articles in English and assign each one a political uncertainty score from 1 to 10, where 1 indicates minimal uncertainty (insignificant or predictable political impact on financial markets) and 10 indicates maximum uncertainty (severe, unpredictable, or disruptive political impact on markets, such as the S&P 500 or other relevant indices).
+        Evaluate the magnitude, the likelihood and the urgency of the political impact, based solely on the information in each article.
+        Articles:
+        {articles}
+        Respond ONLY with a JSON object whose "{BATCH_KEY}" array holds exactly {len(summaries)} objects, one per article and in the same order, with no text before or after it:
+        {{"{BATCH_KEY}": [{{"id": <article number>, "political_uncertainty_score": <int from 1 to 10>, "justification": "<one sentence>"}}]}}
+        """
+
+
+def batch_schema(count):
+    """JSON schema (Ollama `format`) of the answer to build_batch_prompt for count articles."""
+    item = {
+        'type': 'object',
+        'properties': dict({'id': {'type': 'integer', 'minimum': 1, 'maximum': count}}, **UNCERTAINTY_SCHEMA['properties']),
+        'required': ['id'] + UNCERTAINTY_SCHEMA['required'],
+    }
+    return {
+        'type': 'object',
+        'properties': {BATCH_KEY: {'type': 'array', 'items': item, 'minItems': count, 'maxItems': count}},
+        'required': [BATCH_KEY],
+    }
+
+
+def batch_num_predict(count):
+    """Token cap for a batch answer: one UNCERTAINTY_NUM_PREDICT per article."""
+    return count * UNCERTAINTY_NUM_PREDICT
+
+
+def valid_score(value):
+    """Score as an int from 1 to 10 (larger values are capped), or None if unusable."""
+    try:
+        score = int(float(value))
+    except (TypeError, ValueError):
+        return None
+    if score < 1:
+        return None
+    return min(score, 10)
+
+
+def analysis_schema(analysis_type):
+    """JSON schema of an _analyze_with_ollama answer, or None for free-text analysis types."""
+    fields = ANALYSIS_FIELDS.get(analysis_type)
+    if fields is None:
+        return None
+    properties = {}
+    for field, kind in fields.items():
+        if kind == 'list':
+            properties[field] = {'type': 'array', 'items': {'type': 'string'}}
+        elif kind == 'confidence':
+            properties[field] = {'type': 'number', 'minimum': 0, 'maximum': 1}
+        else:
+            properties[field] = {'type': 'string', 'enum': list(kind)}
+    return {'type': 'object', 'properties': properties, 'required': list(fields)}
+
+
+def _strict_object(llm_text):
+    # The whole answer must be one JSON object: no prose around it
+    try:
+        parsed = json.loads(llm_text.strip())
+    except (TypeError, ValueError):
+        return None
+    return parsed if isinstance(parsed, dict) else None
+
+
+def _valid_uncertainty(parsed):
+    # Same checks for a single answer and for each item of a batch answer
+    score = parsed.get('political_uncertainty_score')
+    justification = parsed.get('justification')
+    if isinstance(score, bool) or not isinstance(score, (int, float)) or score != int(score) or not 1 <= score <= 10:
+        return None
+    if not isinstance(justification, str):
+        return None
+    return {'political_uncertainty_score': int(score), 'justification': justification.strip()}
+
+
+def validate_uncertainty(llm_text):
+    """
+    {'political_uncertainty_score', 'justification'} if llm_text is exactly
+    a JSON object matching UNCERTAINTY_SCHEMA, else None.
+    """
+    parsed = _strict_object(llm_text)
+    if parsed is None:
+        return None
+    return _valid_uncertainty(parsed)
+
+
+def validate_analysis(llm_text, analysis_type):
+    """The parsed answer if llm_text is exactly a JSON object with every field of analysis_type valid, else None."""
+    fields = ANALYSIS_FIELDS.get(analysis_type)
+    parsed = _strict_object(llm_text)
+    if fields is None or parsed is None:
+        return None
+    for field, kind in fields.items():
+        value = parsed.get(field)
+        if kind == 'list':
+            if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+                return None
+        elif kind == 'confidence':
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or not 0 <= value <= 1:
+                return None
+        elif not isinstance(value, str) or value.lower() not in kind:
+            return None
+        else:
+            parsed[field] = value.lower()
+    return parsed
+
+
+class ParseStats:
+    """Thread-safe count of answers parsed strictly vs. through the fallback parsers, per prompt kind."""
+    def __init__(self):
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def record(self, kind, strict):
+        with self._lock:
+            counts = self._counts.setdefault(kind, {'strict': 0, 'fallback': 0})
+            counts['strict' if strict else 'fallback'] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {kind: dict(counts, fallback_rate=round(counts['fallback'] / ((counts['strict'] + counts['fallback']) or 1), 3))
+                    for kind, counts in self._counts.items()}
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+
+
+# Process-wide counters, logged by PoliticalUncertaintyAnalyzer.score_articles
+parse_stats = ParseStats()
+
+
+def extract_uncertainty_data(response_text):
+    """Extract political uncertainty score and justification from model response."""
+    try:
+        # Extract score using regex
+        score_match = re.search(r'political uncertainty score\s*:\s*(\d+)', response_text, re.IGNORECASE)
+        score = int(score_match.group(1)) if score_match else 0
+
+        # Extract justification using regex
+        justification_match = re.search(r'justification\s*:\s*([\s\S]*?)(?=\n*(?:potentially impacted sectors|$))', response_text, re.IGNORECASE)
+        justification = justification_match.group(1).strip() if justification_match else None
+
+        # Return dictionary
+        return {
+            'political_uncertainty_score': score,
+            'justification': justification
+        }
+    except Exception as e:
+        print(f"Error extracting data: {e}")
+        return {
+            'political_uncertainty_score': 0,
+            'justification': None
+        }
+
+
+def _split_items(llm_text, count):
+    """{index: text} of the answer chunks of each article, found by their markers."""
+    markers = [(m.start(), int(m.group(1) or m.group(2)) - 1) for m in _ITEM_MARKER.finditer(llm_text)]
+    chunks = {}
+    for n, (start, index) in enumerate(markers):
+        end = markers[n + 1][0] if n + 1 < len(markers) else len(llm_text)
+        if 0 <= index < count and index not in chunks:
+            chunks[index] = llm_text[start:end]
+    return chunks
+
+
+def parse_batch_response(llm_text, count, stats=None):
+    """
+    Per-article results of a batch prompt: a list of `count` dicts
+    ({'political_uncertainty_score', 'justification'}) or None for the
+    articles that could not be recovered. Items of the JSON array are used
+    first; the rest are parsed from their own chunk of the raw text with
+    extract_uncertainty_data.
+    Each recovered item is counted in stats (parse_stats by default) as
+    strict only if the whole answer is JSON shaped like batch_schema and
+    the item passes the same checks as validate_uncertainty.
+    """
+    stats = parse_stats if stats is None else stats
+    items = [None] * count
+    strict = [False] * count
+    parsed = _strict_object(llm_text)
+    parsed = parsed.get(BATCH_KEY) if parsed is not None else None
+    whole = isinstance(parsed, list)
+    if not whole:
+        match = _ARRAY_START.search(llm_text)
+        end = llm_text.rfind(']') + 1
+        if match and end > match.start():
+            try:
+                parsed = json.loads(llm_text[match.start():end])
+            except ValueError:
+                parsed = None
+    if isinstance(parsed, list):
+        for position, item in enumerate(parsed):
+            if not isinstance(item, dict):
+                continue
+            try:
+                index = int(item.get('id', position + 1)) - 1
+            except (TypeError, ValueError):
+                index = position
+            score = valid_score(item.get('political_uncertainty_score'))
+            if 0 <= index < count and items[index] is None and score is not None:
+                valid = _valid_uncertainty(item) if whole else None
+                strict[index] = valid is not None
+                items[index] = valid or {'political_uncertainty_score': score, 'justification': item.get('justification')}
+    if None in items:
+        for index, chunk in _split_items(llm_text, count).items():
+            if items[index] is not None:
+                continue
+            # extract_uncertainty_data expects "political uncertainty score: N"
+            data = extract_uncertainty_data(chunk.lower().replace('_', ' ').replace('"', ''))
+            score = valid_score(data['political_uncertainty_score'])
+            if score is not None:
+                items[index] = {'political_uncertainty_score': score, 'justification': data['justification']}
+    for item, is_strict in zip(items, strict):
+        if item is not None:
+            stats.record('politic_uncertity_batch', is_strict)
+    return items
@@ -1,12 +1,99 @@
+import contextlib
+import logging
+import os
 from datetime import datetime
 from typing import Dict, List
 import working_wjson as wj  # Assuming this is your JSON utility module
 import news as nw
-from transformers import pipeline
 import time
+import threading
 from concurrent.futures import ThreadPoolExecutor, as_completed
-import re
+import hashlib
 from ollama_config import OllamaClient, OLLAMA_CONFIG 
+import llm_cache
+import ollama_async
+import political_prompts
+from log_utils import timed
+
+logger = logging.getLogger(__name__)
+
+# Scores finished in an interrupted political_uncertity_average run: {company: {summary_hash: score}}
+SCORES_CHECKPOINT_PATH = 'data/political_scores_checkpoint.json'
+CHECKPOINT_EVERY = 10  # completed articles between checkpoint writes
+# Bump when the politic_uncertity prompt changes, so cached scores are not reused
+POLITIC_UNCERTITY_PROMPT_VERSION = 'v2'
+HF_MODEL = "cardiffnlp/twitter-roberta-base-sentiment-latest"
+# Texts per forward pass in the batched HuggingFace path
+HF_BATCH_SIZE = int(os.getenv('XBOT_HF_BATCH_SIZE', '16'))
+# Articles per prompt in score_articles (1 = one prompt per article)
+POLITIC_BATCH_SIZE = int(os.getenv('XBOT_POLITIC_BATCH_SIZE', '1'))
+
+# Process-wide LLM backends, created on first use and shared by every analyzer
+_shared_lock = threading.Lock()
+_ollama_client = None
+_ollama_ready = None
+_hf_pipeline = None
+
+
+def get_ollama_client():
+    """Shared OllamaClient with the persistent response cache."""
+    global _ollama_client
+    with _shared_lock:
+        if _ollama_client is None:
+            _ollama_client = OllamaClient(response_cache=llm_cache.get_llm_cache())
+        return _ollama_client
+
+
+def ollama_ready(refresh=False):
+    """True if Ollama serves llama2:7b. Probed once per process unless refresh."""
+    global _ollama_ready
+    client = get_ollama_client()
+    with _shared_lock:
+        if _ollama_ready is None or refresh:
+            if client.is_available():
+                models = client.list_models()
+                if "llama2:7b" in models:
+                    print("✅ Ollama LLM (llama2:7b) initialized successfully")
+                    _ollama_ready = True
+                else:
+                    print("⚠️ Ollama running but llama2:7b not found")
+                    _ollama_ready = False
+            else:
+                print("⚠️ Ollama not available, falling back to HuggingFace")
+                _ollama_ready = False
+        return _ollama_ready
+
+
+def get_hf_pipeline():
+    """Shared HuggingFace pipeline; transformers/torch are imported on first call."""
+    global _hf_pipeline
+    with _shared_lock:
+        if _hf_pipeline is None:
+            from transformers import pipeline
+            _hf_pipeline = pipeline(
+                "text-classification",
+                model=HF_MODEL,
+                return_all_scores=True
+            )
+            print("✅ HuggingFace LLM initialized successfully")
+        return _hf_pipeline
+
+
+def warm_up(huggingface=None):
+    """
+    Pay the LLM start-up cost once, e.g. when a long-running process starts:
+    probe Ollama and, when it cannot serve llama2:7b (or huggingface=True),
+    load the HuggingFace pipeline and run one inference.
+    """
+    start = time.time()
+    use_hf = not ollama_ready() if huggingface is None else huggingface
+    if use_hf:
+        try:
+            huggingface_batch(get_hf_pipeline(), ["warm up"], batch_size=1)
+        except Exception as e:
+            print(f"⚠️ HuggingFace warm-up failed: {e}")
+    logger.info("LLM warm-up took %.1f s", time.time() - start)
+
 
 class PoliticalUncertaintyAnalyzer:
     """
@@ -25,16 +112,15 @@ class PoliticalUncertaintyAnalyzer:
         #queries for get political news
         self.political_queries=wj.load_from_json('data/political_news_queries.json')
 
-        #news extractor(maybe no needeed)
-        self.news_extractor=nw.NewsExtractor()
+        #news extractor(maybe no needeed): created on first use
+        self._news_extractor = None
         
-        # LLM Configuration - Supporting both HuggingFace and Ollama
+        # LLM Configuration - Supporting both HuggingFace and Ollama.
+        # Backends are initialized on first use (see _ensure_llm) and shared by all analyzers.
         self.use_llm = use_llm
-        self.llm_client = None
-        self.ollama_client = None
-        
-        if self.use_llm:
-            self._initialize_llm()
+        self._llm_client = None
+        self._ollama_client = None
+        self._llm_ready = False
         
         # General political uncertainty keywords
         self.political_keywords = [
@@ -60,29 +146,39 @@ class PoliticalUncertaintyAnalyzer:
 
         
           
+    @property
+    def news_extractor(self):
+        if self._news_extractor is None:
+            self._news_extractor = nw.NewsExtractor()
+        return self._news_extractor
+
+    @property
+    def ollama_client(self):
+        self._ensure_llm()
+        return self._ollama_client
+
+    @property
+    def llm_client(self):
+        self._ensure_llm()
+        return self._llm_client
+
+    def _ensure_llm(self):
+        """Initialize the LLM backends the first time one is needed."""
+        if not self._llm_ready:
+            self._llm_ready = True
+            if self.use_llm:
+                self._initialize_llm()
+
     def _initialize_llm(self):
         """Initialize both HuggingFace and Ollama LLM clients."""
         # Try Ollama first (faster and more powerful)
-        self.ollama_client = OllamaClient()
-        
-        if self.ollama_client.is_available():
-            models = self.ollama_client.list_models()
-            if "llama2:7b" in models:
-                print("✅ Ollama LLM (llama2:7b) initialized successfully")
-                return
-            else:
-                print("⚠️ Ollama running but llama2:7b not found")
-        else:
-            print("⚠️ Ollama not available, falling back to HuggingFace")
+        self._ollama_client = get_ollama_client()
+        if ollama_ready():
+            return
         
         # Fallback to HuggingFace
         try:
-            self.llm_client = pipeline(
-                "text-classification",
-                model="cardiffnlp/twitter-roberta-base-sentiment-latest",
-                return_all_scores=True
-            )
-            print("✅ HuggingFace LLM initialized successfully")
+            self._llm_client = get_hf_pipeline()
                 
         except ImportError as e:
             print(f"⚠️ HuggingFace transformers not available: {e}")
@@ -165,7 +261,7 @@ class PoliticalUncertaintyAnalyzer:
             
             # Check for general political content
             political_mentions = sum(1 for keyword in self.political_keywords if keyword in article_text)
-            print('political mentions',political_mentions)
+            logger.debug("political mentions %d", political_mentions)
             
             if political_mentions > 0:
                 political_articles.append({
@@ -187,7 +283,7 @@ class PoliticalUncertaintyAnalyzer:
         max_possible_score = len(news_data) * len(self.political_keywords)
         political_uncertainty_score = min(100, (total_political_score / max_possible_score) * 100) if max_possible_score > 0 else 0
         #this is giving me 0, see how can i calculate the score in a better way
-        print('political_uncertainty_score',political_uncertainty_score)
+        logger.debug("political_uncertainty_score %s", political_uncertainty_score)
 
         return {
             'political_score': round(political_uncertainty_score, 2),
@@ -197,21 +293,26 @@ class PoliticalUncertaintyAnalyzer:
             'political_articles': political_articles[:5]  # Top 5 most political articles
         }
     
-    def analyze_with_llm(self, text: str, analysis_type: str = "political_sentiment") -> Dict:
+    def analyze_with_llm(self, text: str, analysis_type: str = "political_sentiment", ollama_available=None) -> Dict:
         """
         Analyze text using available LLM (Ollama or HuggingFace) for political sentiment insights.   
         Args:
             text: Text to analyze
-            analysis_type: Type of analysis ('political_sentiment', 'risk_assessment', 'impact_analysis')
+            analysis_type: Type of analysis ('political_sentiment', 'risk_assessment', 'impact_analysis',
+                or 'combined' for all of them in one call)
+            ollama_available: result of a previous is_available() check, to skip the health check
         Returns:
             Dict with LLM analysis results
         """
+        self._ensure_llm()
         if not self.use_llm:
             return {"error": "LLM not available", "fallback": True}
         
         try:
+            if ollama_available is None:
+                ollama_available = bool(self.ollama_client and self.ollama_client.is_available())
             # Try Ollama first
-            if self.ollama_client and self.ollama_client.is_available():
+            if ollama_available:
                 return self._analyze_with_ollama(text, analysis_type)
             # Fallback to HuggingFace
             elif self.llm_client:
@@ -267,15 +368,43 @@ class PoliticalUncertaintyAnalyzer:
             3. confidence_score: a number between 0.0 and 1.0
             4. time_horizon: "short-term", "medium-term", or "long-term"
 
+            JSON Response:"""
+        elif analysis_type == "combined":
+            prompt = f"""
+            Analyze the political sentiment, risk and business impact of this text and provide a JSON response:
+
+            Text: "{text}"
+
+            Please respond with a single JSON object containing:
+            1. political_sentiment: "positive", "negative", or "neutral"
+            2. uncertainty_level: "low", "medium", or "high"
+            3. risk_level: "low", "medium", or "high"
+            4. business_impact: "minimal", "moderate", or "significant"
+            5. impact_level: "low", "medium", or "high"
+            6. time_horizon: "short-term", "medium-term", or "long-term"
+            7. confidence_score: a number between 0.0 and 1.0
+            8. key_political_topics: list of identified political topics
+            9. risk_factors: list of identified risk factors
+            10. affected_sectors: list of business sectors that might be affected
+
             JSON Response:"""
         else:
             prompt = f"Analyze this text for political content: {text}"
 
-        # Call Ollama
-        response = self.ollama_client.generate("llama2:7b", prompt)
+        # Call Ollama in JSON mode (stops reading once the JSON object closes)
+        schema = political_prompts.analysis_schema(analysis_type)
+        options = {"num_predict": political_prompts.ANALYSIS_NUM_PREDICT[analysis_type]} if schema else None
+        response = self.ollama_client.generate_json("llama2:7b", prompt, format=schema, options=options)
         
         if response and 'response' in response:
             llm_text = response['response']
+            if schema is not None:
+                strict = political_prompts.validate_analysis(llm_text, analysis_type)
+                political_prompts.parse_stats.record(analysis_type, strict is not None)
+                if strict is not None:
+                    strict["llm_provider"] = "ollama"
+                    strict["model"] = "llama2:7b"
+                    return strict
             
             # Try to extract JSON from response
             try:
@@ -300,7 +429,7 @@ class PoliticalUncertaintyAnalyzer:
             llm_lower = llm_text.lower()
             
             
-            if analysis_type == "political_sentiment":
+            if analysis_type in ("political_sentiment", "combined"):
                 if any(word in llm_lower for word in ['positive', 'optimistic', 'favorable']):
                     sentiment = "positive"
                 elif any(word in llm_lower for word in ['negative', 'pessimistic', 'unfavorable']):
@@ -315,7 +444,7 @@ class PoliticalUncertaintyAnalyzer:
                 else:
                     uncertainty = "low"
                 
-                return {
+                sentiment_result = {
                     "political_sentiment": sentiment,
                     "uncertainty_level": uncertainty,
                     "confidence_score": 0.7,
@@ -323,25 +452,29 @@ class PoliticalUncertaintyAnalyzer:
                     "model": "llama2:7b",
                     "raw_response": llm_text[:200] + "..." if len(llm_text) > 200 else llm_text
                 }
-            
+                if analysis_type == "political_sentiment":
+                    return sentiment_result
+
+            # For risk and impact analysis
+            if any(word in llm_lower for word in ['high', 'significant', 'major']):
+                level = "high"
+            elif any(word in llm_lower for word in ['medium', 'moderate']):
+                level = "medium"
             else:
-                # For risk and impact analysis
-                if any(word in llm_lower for word in ['high', 'significant', 'major']):
-                    level = "high"
-                elif any(word in llm_lower for word in ['medium', 'moderate']):
-                    level = "medium"
-                else:
-                    level = "low"
-                
-                return {
-                    "risk_level": level,
-                    "business_impact": level,
-                    "impact_level": level,
-                    "confidence_score": 0.7,
-                    "llm_provider": "ollama",
-                    "model": "llama2:7b",
-                    "raw_response": llm_text[:200] + "..." if len(llm_text) > 200 else llm_text
-                }
+                level = "low"
+
+            if analysis_type == "combined":
+                sentiment_result.update({"risk_level": level, "business_impact": level, "impact_level": level})
+                return sentiment_result
+            return {
+                "risk_level": level,
+                "business_impact": level,
+                "impact_level": level,
+                "confidence_score": 0.7,
+                "llm_provider": "ollama",
+                "model": "llama2:7b",
+                "raw_response": llm_text[:200] + "..." if len(llm_text) > 200 else llm_text
+            }
         
         return {
             "error": "Failed to get response from Ollama",
@@ -349,8 +482,8 @@ class PoliticalUncertaintyAnalyzer:
             "fallback": True
         }
 
-    def politic_uncertity(self,summary):
-        prompt=f"""
+    def _politic_uncertity_prompt(self, summary):
+        return f"""
         Analyze the following news article in English and assign a political uncertainty score from 1 to 10, where 1 indicates minimal uncertainty (insignificant or predictable political impact on financial markets) and 10 indicates maximum uncertainty (severe, unpredictable, or disruptive political impact on markets, such as the S&P 500 or other relevant indices):
         {summary}
         Evaluate the magnitude of the political impact (e.g., does it affect a single company, a sector, or the entire market?).
@@ -359,13 +492,28 @@ class PoliticalUncertaintyAnalyzer:
         Use an objective approach, basing the analysis solely on the information in the news article, without external speculation.
         Please respond with a JSON object containing:
             political_uncertainty_score: [number int from 1 to 10],
-            justification: [Clear explanation str of why this score was assigned, considering political factors such as regulations, geopolitical tensions, fiscal policies, elections, or government stability, and their likelihood of affecting market volatility. Include potentially impacted sectors or companies if relevant.]
-        Instructions:
+            justification: [One or two sentences (str) explaining why this score was assigned, considering political factors such as regulations, geopolitical tensions, fiscal policies, elections, or government stability, and their likelihood of affecting market volatility. Mention potentially impacted sectors or companies if relevant.]
+        Respond ONLY with the JSON object.
+        """
+
+    def _politic_uncertity_key(self, summary):
+        # The score only depends on the model, the prompt template and the article text
+        return llm_cache.make_key("llama2:7b", POLITIC_UNCERTITY_PROMPT_VERSION, summary)
+
+    def _parse_politic_uncertity(self, response):
+        """
+        Score dict of a politic_uncertity answer (generate-style response dict),
+        or None when Ollama gave no answer (the article is not scored).
+        Answers are validated strictly against UNCERTAINTY_SCHEMA; the loose
+        parsers below are only the fallback, counted in political_prompts.parse_stats.
         """
-        response = self.ollama_client.generate("llama2:7b", prompt)
-        
         if response and 'response' in response:
             llm_text = response['response']
+            strict = political_prompts.validate_uncertainty(llm_text)
+            political_prompts.parse_stats.record('politic_uncertity', strict is not None)
+            if strict is not None:
+                return strict
+            logger.debug("politic_uncertity answer failed strict validation: %r", llm_text[:200])
              # Try to extract JSON from response
             try:
                 # Look for JSON in the response
@@ -390,90 +538,192 @@ class PoliticalUncertaintyAnalyzer:
 
         else:
             print('not response sorry')
-            return{
-                'political_uncertainty_score':0,
-                'justification':None
-            }
+            return None
+
+    def politic_uncertity(self,summary):
+        prompt = self._politic_uncertity_prompt(summary)
+        response = self.ollama_client.generate_json("llama2:7b", prompt, cache_key=self._politic_uncertity_key(summary),
+                                                    format=political_prompts.UNCERTAINTY_SCHEMA,
+                                                    options={"num_predict": political_prompts.UNCERTAINTY_NUM_PREDICT})
+        return self._parse_politic_uncertity(response)
+
+    async def politic_uncertity_async(self, summaries, client=None):
+        """
+        politic_uncertity for many summaries through an AsyncOllamaClient
+        (a temporary one sharing the response cache by default): requests
+        run concurrently, bounded by the client's semaphore. Results come
+        back in order, None for articles Ollama did not answer.
+        """
+        owned = client is None
+        if owned:
+            cache = self.ollama_client.response_cache if self.ollama_client else None
+            client = ollama_async.AsyncOllamaClient(response_cache=cache)
+        prompts = [self._politic_uncertity_prompt(summary) for summary in summaries]
+        keys = [self._politic_uncertity_key(summary) for summary in summaries]
+        try:
+            responses = await client.gather_generate("llama2:7b", prompts, cache_keys=keys,
+                                                     format=political_prompts.UNCERTAINTY_SCHEMA,
+                                                     options={"num_predict": political_prompts.UNCERTAINTY_NUM_PREDICT})
+        finally:
+            if owned:
+                await client.close()
+        return [self._parse_politic_uncertity(response) for response in responses]
+
+    def politic_uncertity_batch(self, summaries):
+        """
+        politic_uncertity for several summaries in a single prompt. Results
+        come back in order; articles the batch answer does not cover are
+        scored one by one with politic_uncertity.
+        """
+        cache = self.ollama_client.response_cache
+        keys = [llm_cache.make_key("llama2:7b", political_prompts.POLITIC_BATCH_PROMPT_VERSION, summary) for summary in summaries]
+        results = [cache.get(key) if cache is not None else None for key in keys]
+        missing = [n for n, result in enumerate(results) if result is None]
+        if missing:
+            prompt = political_prompts.build_batch_prompt([summaries[n] for n in missing])
+            response = self.ollama_client.generate_json("llama2:7b", prompt,
+                                                        format=political_prompts.batch_schema(len(missing)),
+                                                        options={"num_predict": political_prompts.batch_num_predict(len(missing))})
+            llm_text = response.get('response', '') if response else ''
+            items = political_prompts.parse_batch_response(llm_text, len(missing))
+            for n, item in zip(missing, items):
+                if item is None:
+                    logger.debug("Batch answer missing article %d, scoring it alone", n)
+                    results[n] = self.politic_uncertity(summaries[n])
+                    continue
+                results[n] = item
+                if cache is not None:
+                    cache.put(keys[n], item)
+        return results
 
     def political_uncertity_average(self,new_extractor:bool):
         news=self.get_news_data_using_thread(new_extractor)
-        average=0
+        scores=self.score_articles(news)
+        previous={}
+        if os.path.exists('data/uncertity_per_company.json'):
+            previous=wj.load_from_json('data/uncertity_per_company.json')
         uncertity_per_company={}
         for company in news.keys():
-            average=0
-            total=len(news[company])
+            # Articles whose scoring failed are None: left out, not counted as 0
+            scored=[score for score in scores[company] if score is not None]
+            total=len(scored)
             if total==0:
-                uncertity_per_company[company]=0
+                # Nothing scored this run: keep the last known average if scoring failed
+                uncertity_per_company[company]=previous.get(company, 0) if news[company] else 0
                 continue
-            for n in news[company]:
-                aux=self.politic_uncertity(n['summary'])
-                score=aux['political_uncertainty_score']
-                score=score if score<=10 else 10
-                average+=score
-                print('score',score)
+            average=sum(scored)
             uncertity_per_company[company]=average/total 
-            print("avarage ",average/total)
+            logger.info("%s average political uncertainty %.2f over %d of %d articles", company, average/total, total, len(news[company]))
 
         print(uncertity_per_company)
         wj.save_to_json(uncertity_per_company,'data/uncertity_per_company.json')
         return uncertity_per_company
+
+    def score_articles(self, news, max_in_flight=None, checkpoint_path=SCORES_CHECKPOINT_PATH, batch_size=None):
+        """
+        Score every article of every company with politic_uncertity, keeping
+        max_in_flight requests open (OLLAMA_NUM_PARALLEL by default). With
+        batch_size > 1, articles are sent batch_size per prompt
+        (politic_uncertity_batch).
+        Finished scores are checkpointed, so a rerun after a crash only sends
+        the articles that were still missing. Returns {company: [score per article]},
+        with None for articles whose scoring failed (they stay out of the
+        checkpoint, which is kept for the next run).
+        """
+        max_in_flight = max_in_flight or OLLAMA_CONFIG['num_parallel']
+        batch_size = max(1, batch_size or POLITIC_BATCH_SIZE)
+        checkpoint = {}
+        if os.path.exists(checkpoint_path):
+            try:
+                checkpoint = dict(wj.load_from_json(checkpoint_path))
+            except (OSError, ValueError) as e:
+                print(f"[WARN] Could not read checkpoint {checkpoint_path}: {e}")
+        scores = {company: [None] * len(articles) for company, articles in news.items()}
+        done = {company: 0 for company in news}
+        pending = []
+        for company, articles in news.items():
+            saved = checkpoint.setdefault(company, {})
+            for i, article in enumerate(articles):
+                key = hashlib.sha1(str(article['summary']).encode('utf-8')).hexdigest()
+                if key in saved:
+                    scores[company][i] = saved[key]
+                    done[company] += 1
+                else:
+                    pending.append((company, i, key, article['summary']))
+        resumed = sum(done.values())
+        if resumed:
+            logger.info("Resuming from checkpoint: %d articles already scored", resumed)
+        unsaved = 0
+        failed = 0
+
+        def score(summaries):
+            if len(summaries) == 1:
+                results = [self.politic_uncertity(summaries[0])]
+            else:
+                results = self.politic_uncertity_batch(summaries)
+            if any(aux is None for aux in results):
+                # No answer is a failure, not a score of 0: handled like an exception below
+                raise RuntimeError("no response from Ollama")
+            return [min(aux['political_uncertainty_score'], 10) for aux in results]
+
+        chunks = [pending[n:n + batch_size] for n in range(0, len(pending), batch_size)]
+        with timed(logger, 'score_articles') as timing:
+            with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+                futures = {executor.submit(score, [item[3] for item in chunk]): chunk for chunk in chunks}
+                for future in as_completed(futures):
+                    chunk = futures[future]
+                    try:
+                        results = future.result()
+                    except Exception as e:
+                        # Not checkpointed: retried on the next run
+                        print(f"[ERROR] Scoring {len(chunk)} article(s) of {chunk[0][0]} failed: {e}")
+                        results = None
+                        failed += len(chunk)
+                    for n, (company, i, key, _) in enumerate(chunk):
+                        result = results[n] if results is not None else None
+                        if results is not None:
+                            checkpoint[company][key] = result
+                            unsaved += 1
+                        scores[company][i] = result
+                        done[company] += 1
+                        logger.debug("score %s", result)
+                        logger.info("[PROGRESS] %s %d/%d articles scored", company, done[company], len(news[company]))
+                    if unsaved >= CHECKPOINT_EVERY:
+                        wj.save_to_json(checkpoint, checkpoint_path)
+                        unsaved = 0
+            timing['articles'] = len(pending)
+            timing['batch_size'] = batch_size
+        if self.ollama_client is not None and self.ollama_client.response_cache is not None:
+            self.ollama_client.response_cache.flush()
+            logger.info("LLM response cache: %s", self.ollama_client.response_cache.stats())
+        logger.info("LLM answer parsing (strict vs fallback): %s", political_prompts.parse_stats.snapshot())
+        if failed:
+            # Keep the finished scores: the next run only retries the failed articles
+            wj.save_to_json(checkpoint, checkpoint_path)
+            print(f"[WARN] {failed} article(s) could not be scored; checkpoint kept at {checkpoint_path}")
+        elif os.path.exists(checkpoint_path):
+            # Every article has a score now: the checkpoint is no longer needed
+            os.remove(checkpoint_path)
+        return scores
             
     def extract_uncertainty_data(self,response_text):
         """Extract political uncertainty score and justification from model response."""
-        try:
-            # Extract score using regex
-            score_match = re.search(r'political uncertainty score\s*:\s*(\d+)', response_text, re.IGNORECASE)
-            score = int(score_match.group(1)) if score_match else 0
-            
-            # Extract justification using regex
-            justification_match = re.search(r'justification\s*:\s*([\s\S]*?)(?=\n*(?:potentially impacted sectors|$))', response_text, re.IGNORECASE)
-            justification = justification_match.group(1).strip() if justification_match else None
-            
-            # Return dictionary
-            return {
-                'political_uncertainty_score': score,
-                'justification': justification
-            }
-        except Exception as e:
-            print(f"Error extracting data: {e}")
-            return {
-                'political_uncertainty_score': 0,
-                'justification': None
-            }
+        return political_prompts.extract_uncertainty_data(response_text)
 
     def _analyze_with_huggingface(self, text: str, analysis_type: str) -> Dict:
         """Analyze using HuggingFace models.fix this for analize always the sentiment"""
-        if analysis_type == "political_sentiment":
+        if analysis_type in ("political_sentiment", "combined"):
             results = self.llm_client(text)
-            sentiment_scores = {item['label']: item['score'] for item in results[0]}
-            
-            # Map HuggingFace labels to our political sentiment format
-            political_sentiment = max(sentiment_scores, key=sentiment_scores.get)
-            
-            # Determine uncertainty level based on confidence
-            max_score = max(sentiment_scores.values())
-            if max_score >= 0.8:
-                uncertainty_level = "low"
-            elif max_score >= 0.6:
-                uncertainty_level = "medium"
-            else:
-                uncertainty_level = "high"
-            
-            return {
-                "political_sentiment": political_sentiment.lower(),
-                "sentiment_scores": sentiment_scores,
-                "uncertainty_level": uncertainty_level,
-                "confidence_score": max_score,
-                "llm_provider": "huggingface",
-                "model": "cardiffnlp/twitter-roberta-base-sentiment-latest"
-            }
-           # For other analysis types, return basic sentiment info (fix this pendin)
-        return {
-            "message": f"Analysis type '{analysis_type}' simplified to sentiment analysis",
-            "risk_level": "medium",  # Default fallback
-            "business_impact": "medium",  # Default fallback
-            "llm_provider": "huggingface"
-        }
+            return huggingface_result(results[0], analysis_type)
+        return huggingface_result(None, analysis_type)
+
+    def analyze_with_huggingface_batch(self, texts: List[str], analysis_type: str = "political_sentiment",
+                                       batch_size: int = None) -> List[Dict]:
+        """
+        _analyze_with_huggingface for a list of texts: one pipeline run with
+        batch_size texts per forward pass. Results keep the order of texts.
+        """
+        return huggingface_batch(self.llm_client, texts, analysis_type, batch_size)
     
     def _calculate_enhanced_score(self, traditional_political: Dict, 
                                 sector_analysis: Dict, llm_insights: Dict) -> float:
@@ -490,8 +740,9 @@ class PoliticalUncertaintyAnalyzer:
         llm_count = 0
         
         for article in llm_insights.get("articles", []):
-            sentiment = article.get("sentiment_analysis", {})
-            risk = article.get("risk_analysis", {})
+            # One combined analysis per article, or the older separate ones
+            sentiment = article.get("analysis") or article.get("sentiment_analysis", {})
+            risk = article.get("analysis") or article.get("risk_analysis", {})
             
             # Sentiment adjustment
             if sentiment.get("uncertainty_level") == "high":
@@ -522,7 +773,7 @@ class PoliticalUncertaintyAnalyzer:
         
         confidence_scores = []
         for article in llm_insights["articles"]:
-            sentiment = article.get("sentiment_analysis", {})
+            sentiment = article.get("analysis") or article.get("sentiment_analysis", {})
             if "confidence" in sentiment or "confidence_score" in sentiment:
                 confidence_scores.append(
                     sentiment.get("confidence", sentiment.get("confidence_score", 0.5))
@@ -553,23 +804,28 @@ class PoliticalUncertaintyAnalyzer:
         # LLM Enhancement using HuggingFace
         llm_insights = {"articles": []}
         
+        self._ensure_llm()
         if self.use_llm:
+            # One health check for all articles instead of one per LLM call
+            ollama_available = bool(self.ollama_client and self.ollama_client.is_available())
             count=0
-            for article in news_data[company_name][:3]:  # Analyze top 3 articles
-                article_text = f"{article['title']} {article['summary']}"
-                
-                # HuggingFace sentiment analysis
-                sentiment_analysis = self.analyze_with_llm(article_text, "political_sentiment")
-                # Use sentiment analysis for risk and impact assessment too
-                risk_analysis = self.analyze_with_llm(article_text, "risk_assessment")
-                impact_analysis = self.analyze_with_llm(article_text, "impact_analysis")
-                
+            articles = news_data[company_name][:3]  # Analyze top 3 articles
+            texts = [f"{article['title']} {article['summary']}" for article in articles]
+            if not ollama_available and self.llm_client:
+                # HuggingFace fallback: all articles in one batched pipeline run
+                try:
+                    analyses = self.analyze_with_huggingface_batch(texts, "combined")
+                except Exception as e:
+                    print(f"❌ LLM analysis error: {e}")
+                    analyses = [{"error": str(e), "fallback": True} for _ in texts]
+            else:
+                # Sentiment, uncertainty, risk, impact and time horizon in a single call
+                analyses = [self.analyze_with_llm(text, "combined", ollama_available=ollama_available) for text in texts]
+            for article, analysis in zip(articles, analyses):
                 llm_insights["articles"].append({
                     "article_id": count,
                     "title": article['title'],
-                    "sentiment_analysis": sentiment_analysis,
-                    "risk_analysis": risk_analysis,
-                    "impact_analysis": impact_analysis
+                    "analysis": analysis
                 })
                 count=count+1
            
@@ -689,6 +945,64 @@ class PoliticalUncertaintyAnalyzer:
     
 
 
+def huggingface_result(scores, analysis_type):
+    """Result dict of _analyze_with_huggingface from the pipeline scores of one text."""
+    if analysis_type in ("political_sentiment", "combined"):
+        sentiment_scores = {item['label']: item['score'] for item in scores}
+        
+        # Map HuggingFace labels to our political sentiment format
+        political_sentiment = max(sentiment_scores, key=sentiment_scores.get)
+        
+        # Determine uncertainty level based on confidence
+        max_score = max(sentiment_scores.values())
+        if max_score >= 0.8:
+            uncertainty_level = "low"
+        elif max_score >= 0.6:
+            uncertainty_level = "medium"
+        else:
+            uncertainty_level = "high"
+        
+        result = {
+            "political_sentiment": political_sentiment.lower(),
+            "sentiment_scores": sentiment_scores,
+            "uncertainty_level": uncertainty_level,
+            "confidence_score": max_score,
+            "llm_provider": "huggingface",
+            "model": HF_MODEL
+        }
+        if analysis_type == "combined":
+            # Sentiment from the model, risk keeps the same defaults as risk_assessment
+            result.update({"risk_level": "medium", "business_impact": "medium"})
+        return result
+       # For other analysis types, return basic sentiment info (fix this pendin)
+    return {
+        "message": f"Analysis type '{analysis_type}' simplified to sentiment analysis",
+        "risk_level": "medium",  # Default fallback
+        "business_impact": "medium",  # Default fallback
+        "llm_provider": "huggingface"
+    }
+
+
+def huggingface_batch(classifier, texts, analysis_type="political_sentiment", batch_size=None):
+    """
+    Run the text-classification pipeline over texts in batches (truncated to
+    the model's max length, no autograd) and return one result dict per text.
+    """
+    if analysis_type not in ("political_sentiment", "combined"):
+        return [huggingface_result(None, analysis_type) for _ in texts]
+    if not texts:
+        return []
+    batch_size = batch_size or HF_BATCH_SIZE
+    try:
+        import torch
+        no_grad = torch.inference_mode()
+    except ImportError:
+        no_grad = contextlib.nullcontext()
+    with no_grad:
+        outputs = classifier(list(texts), batch_size=batch_size, truncation=True)
+    return [huggingface_result(scores, analysis_type) for scores in outputs]
+
+
 def main():
     #companies=["Tesla","Microsoft", "Nvidia", "Apple", "Amazon", "Alphabet", "Tesla"]
     politics=PoliticalUncertaintyAnalyzer()
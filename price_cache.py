@@ -0,0 +1,283 @@
+import os
+import re
+import tempfile
+import threading
+import time
+import numpy as np
+import pandas as pd
+
+PRICE_CACHE_DIR = 'data/prices'
+# How long a stored history is trusted before asking the source for the tail
+REFRESH_SECONDS = int(os.getenv('XBOT_PRICE_REFRESH', '300'))
+
+# Stored bars fetched again with every tail, to detect split/dividend re-adjustments
+OVERLAP_BARS = 5
+COLUMNS = ('Open', 'High', 'Low', 'Close', 'Volume')
+BAR_DTYPE = np.dtype([('date', 'datetime64[D]')] + [(column, 'f8') for column in COLUMNS])
+
+
+def yfinance_source(ticker, start=None, period=None):
+    """Default source: daily OHLCV bars from yfinance (from start, or for period)."""
+    import yfinance as yf
+    stock = yf.Ticker(ticker)
+    if start is not None:
+        return stock.history(start=start)
+    return stock.history(period=period)
+
+
+def yfinance_batch_source(tickers, start=None, period=None):
+    """Default batch source: one yf.download call, returns {ticker: DataFrame}."""
+    import yfinance as yf
+    kwargs = {'start': start} if start is not None else {'period': period}
+    frame = yf.download(list(tickers), group_by='ticker', auto_adjust=True, progress=False, threads=True, **kwargs)
+    if frame is None or frame.empty:
+        return {}
+    if not isinstance(frame.columns, pd.MultiIndex):
+        return {tickers[0]: frame}
+    available = frame.columns.get_level_values(0)
+    # Rows where a ticker did not trade come back as NaN
+    return {ticker: frame[ticker].dropna(how='all') for ticker in tickers if ticker in available}
+
+
+def period_start(last_date, period):
+    """First date covered by a yfinance-style period ('1y', '6mo', '30d', 'max') ending at last_date."""
+    if period == 'max':
+        return None
+    match = re.fullmatch(r'(\d+)(d|wk|mo|y)', period)
+    if not match:
+        raise ValueError(f"Unsupported period: {period}")
+    amount, unit = int(match.group(1)), match.group(2)
+    days = {'d': 1, 'wk': 7, 'mo': 31, 'y': 365}[unit] * amount
+    return last_date - np.timedelta64(days, 'D')
+
+
+class PriceHistoryCache:
+    """
+    Daily OHLCV history per ticker stored as a NumPy .npy file
+    (memory-mapped on read). Only the bars after the last stored one are
+    fetched from the source; the last stored bar is fetched again because it
+    may have been an intraday snapshot, together with OVERLAP_BARS older ones.
+    yfinance bars are split/dividend adjusted: if the older bars came back
+    different, the whole stored range is fetched again. revision(ticker)
+    changes whenever stored bars other than the last one are replaced.
+    The source is any callable source(ticker, start=None, period=None)
+    returning a DataFrame with Open/High/Low/Close/Volume columns;
+    batch_source(tickers, start=None, period=None) returns {ticker: DataFrame}
+    and is used by update_many (per-ticker calls when there is none).
+    """
+    def __init__(self, root=PRICE_CACHE_DIR, source=None, refresh_seconds=REFRESH_SECONDS, batch_source=None):
+        self.root = root
+        self.source = source or yfinance_source
+        # A stand-in source without a batch version falls back to per-ticker calls
+        self.batch_source = batch_source or (yfinance_batch_source if source is None else None)
+        self.refresh_seconds = refresh_seconds
+        self.fetches = 0
+        self._full_period = set()  # (ticker, period) already fetched in full this run
+        self._revisions = {}
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def _path(self, ticker):
+        return os.path.join(self.root, f"{ticker.upper()}.npy")
+
+    def _lock(self, ticker):
+        with self._locks_guard:
+            return self._locks.setdefault(ticker.upper(), threading.Lock())
+
+    def load(self, ticker):
+        """Stored bars (structured array, oldest first) or None."""
+        path = self._path(ticker)
+        if not os.path.exists(path):
+            return None
+        try:
+            return np.load(path, mmap_mode='r')
+        except (OSError, ValueError) as e:
+            print(f"[WARN] Could not read price cache {path}: {e}")
+            return None
+
+    def revision(self, ticker):
+        """Counter bumped each time the stored history of ticker is rewritten (not just extended)."""
+        return self._revisions.get(ticker.upper(), 0)
+
+    def _save(self, ticker, bars, append=False):
+        if not append:
+            self._revisions[ticker.upper()] = self.revision(ticker) + 1
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, bars)
+            os.replace(tmp_path, self._path(ticker))
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def _is_fresh(self, ticker):
+        try:
+            return time.time() - os.path.getmtime(self._path(ticker)) < self.refresh_seconds
+        except OSError:
+            return False
+
+    def _fetch(self, ticker, start=None, period=None):
+        self.fetches += 1
+        return self._to_bars(self.source(ticker, start=start, period=period))
+
+    def _fetch_batch(self, tickers, start=None, period=None):
+        self.fetches += 1
+        frames = self.batch_source(tickers, start=start, period=period) or {}
+        return {ticker.upper(): self._to_bars(frame) for ticker, frame in frames.items()}
+
+    def _to_bars(self, frame):
+        if frame is None or len(frame) == 0:
+            return np.empty(0, dtype=BAR_DTYPE)
+        index = pd.DatetimeIndex(frame.index)
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        bars = np.empty(len(frame), dtype=BAR_DTYPE)
+        bars['date'] = index.values.astype('datetime64[D]')
+        for column in COLUMNS:
+            bars[column] = frame[column].to_numpy(dtype='f8') if column in frame else np.nan
+        return bars
+
+    def update(self, ticker, period='1y'):
+        """Bring the stored history up to date and return it."""
+        with self._lock(ticker):
+            stored = self.load(ticker)
+            if stored is None or len(stored) == 0:
+                bars = self._fetch(ticker, period=period)
+            elif self._is_fresh(ticker):
+                return stored
+            else:
+                tail = self._fetch(ticker, start=str(self._overlap_start(stored)))
+                return self._merge_tail(ticker, stored, tail)
+            if len(bars) == 0:
+                return None
+            self._save(ticker, bars)
+            return self.load(ticker)
+
+    def _overlap_start(self, stored):
+        return stored['date'][max(0, len(stored) - 1 - OVERLAP_BARS)]
+
+    def _readjusted(self, stored, tail):
+        """True if the tail's bars older than the last stored one differ from the stored ones."""
+        older = tail[tail['date'] < stored['date'][-1]]
+        common, stored_idx, tail_idx = np.intersect1d(stored['date'], older['date'], return_indices=True)
+        if len(common) == 0:
+            return False
+        return not np.allclose(stored['Close'][stored_idx], older['Close'][tail_idx], rtol=1e-4, equal_nan=True)
+
+    def _merge_tail(self, ticker, stored, tail):
+        if self._readjusted(stored, tail):
+            # Split or dividend: every stored price is on the old basis, fetch the whole range again
+            print(f"[INFO] Price history of {ticker} was re-adjusted, fetching it again")
+            bars = self._fetch(ticker, start=str(stored['date'][0]))
+            if len(bars):
+                self._save(ticker, bars)
+                return self.load(ticker)
+        tail = tail[tail['date'] >= stored['date'][-1]]
+        if len(tail) == 0:
+            # Nothing new (weekend/holiday): just mark the history as checked
+            os.utime(self._path(ticker))
+            return stored
+        # Bars from the tail replace any stored bar of the same day
+        keep = stored[stored['date'] < tail['date'][0]]
+        self._save(ticker, np.concatenate([keep, tail]), append=True)
+        return self.load(ticker)
+
+    def update_many(self, tickers, period='1y'):
+        """
+        update() for many tickers with at most two source calls: one for
+        tickers never stored (full period) and one for the stale ones
+        (from the oldest overlap start among them). Returns {ticker: bars or None}.
+        """
+        tickers = list(dict.fromkeys(ticker.upper() for ticker in tickers))
+        if self.batch_source is None:
+            return {ticker: self.update(ticker, period=period) for ticker in tickers}
+        result, missing, stale = {}, [], {}
+        for ticker in tickers:
+            stored = self.load(ticker)
+            if stored is None or len(stored) == 0:
+                missing.append(ticker)
+            elif self._is_fresh(ticker):
+                result[ticker] = stored
+            else:
+                stale[ticker] = stored
+        if missing:
+            fetched = self._fetch_batch(missing, period=period)
+            for ticker in missing:
+                bars = fetched.get(ticker)
+                with self._lock(ticker):
+                    if bars is not None and len(bars):
+                        self._save(ticker, bars)
+                        result[ticker] = self.load(ticker)
+                    else:
+                        result[ticker] = None
+        if stale:
+            start = min(self._overlap_start(stored) for stored in stale.values())
+            fetched = self._fetch_batch(list(stale), start=str(start))
+            for ticker, stored in stale.items():
+                with self._lock(ticker):
+                    result[ticker] = self._merge_tail(ticker, stored, fetched.get(ticker, np.empty(0, dtype=BAR_DTYPE)))
+        return result
+
+    def covers(self, bars, period):
+        """True when the stored bars reach back as far as period requires."""
+        start = period_start(bars['date'][-1], period)
+        # Allow a few days of slack for weekends/holidays at the start of the range
+        return start is None or bars['date'][0] <= start + np.timedelta64(5, 'D')
+
+    def bars(self, ticker, period='1y'):
+        """Stored bars covering period (structured array, oldest first), or None."""
+        return self._window(ticker, self.update(ticker, period=period), period)
+
+    def bars_many(self, tickers, period='1y'):
+        """bars() for many tickers, refreshed with update_many. Returns {ticker: bars or None}."""
+        updated = self.update_many(tickers, period=period)
+        return {ticker: self._window(ticker, bars, period) for ticker, bars in updated.items()}
+
+    def _window(self, ticker, bars, period):
+        key = (ticker.upper(), period)
+        if bars is not None and len(bars) and key not in self._full_period and not self.covers(bars, period):
+            # Stored range is shorter than requested: fetch the full period once
+            self._full_period.add(key)
+            with self._lock(ticker):
+                fetched = self._fetch(ticker, period=period)
+                if len(fetched):
+                    self._save(ticker, fetched)
+                    bars = self.load(ticker)
+        if bars is None or len(bars) == 0:
+            return None
+        start = period_start(bars['date'][-1], period)
+        if start is not None:
+            bars = bars[bars['date'] >= start]
+        return bars
+
+    def history(self, ticker, period='1y'):
+        """
+        DataFrame like yf.Ticker(ticker).history(period=period), served from
+        disk. Returns an empty DataFrame if nothing is available.
+        """
+        return to_frame(self.bars(ticker, period=period))
+
+
+def to_frame(bars):
+    """OHLCV DataFrame indexed by date for stored bars (empty if None)."""
+    if bars is None:
+        return pd.DataFrame(columns=list(COLUMNS))
+    return pd.DataFrame({column: np.array(bars[column]) for column in COLUMNS},
+                        index=pd.DatetimeIndex(np.array(bars['date']).astype('datetime64[ns]'), name='Date'))
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+def get_price_cache():
+    """Process-wide PriceHistoryCache backed by yfinance."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = PriceHistoryCache()
+        return _default_cache
@@ -2,14 +2,21 @@
 
 import bot
 import company_analyzer as ca
+import log_utils
+import working_wjson as wj
 
-def post_company_analysis(company_name):
+def post_company_analysis(company_name, ticker=None):
     """Get analysis for a company and post it to Twitter"""
     
     print(f"📊 Getting analysis for {company_name}...")
+    if ticker is None:
+        ticker = wj.load_from_json('data/companies.json').get(company_name)
     
-    # Get the formatted analysis
-    analysis = ca.get_company_analysis(company_name) 
+    # Get the formatted analysis (technical data comes from the price cache filled by get_technical_analysis_batch)
+    analysis = ca.get_company_analysis(company_name, ticker)
+    if not analysis or str(analysis).startswith('[ERROR]'):
+        print(f"[ERROR] Not posting analysis for {company_name}: {analysis}")
+        return None
     
     # Post to Twitter
     print("📤 Posting to Twitter...")
@@ -19,12 +26,15 @@ def post_company_analysis(company_name):
     return analysis
 
 if __name__ == "__main__":
+    log_utils.setup_logging()
     # 'Microsoft', 'Nvidia', 'Apple', 'Amazon', 'Alphabet', 'Tesla'
     #in this part i can create the tweets we have been creating
     company_a=ca.CompanyAnalyzer()
+    # refresh price history of every ticker in one batched download first
+    company_a.get_technical_analysis_batch(list(company_a.companies.values()))
     #analysis of all companies saved in the class CompanyAnalyzer
-    for i in company_a.companies.keys():
-        post_company_analysis(i)
+    for i, ticker in company_a.companies.items():
+        post_company_analysis(i, ticker)
  
 
 
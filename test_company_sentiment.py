@@ -0,0 +1,62 @@
+import pytest
+import keyword_matcher as km
+import working_wjson as wj
+
+try:
+    import company_analyzer
+except (Exception, SystemExit) as e:
+    # company_analyzer imports bot, which exits without X API credentials
+    pytest.skip(f"company_analyzer not importable here: {e!r}", allow_module_level=True)
+
+
+def article(title, summary=''):
+    return {'title': title, 'summary': summary}
+
+
+NEWS = {
+    'data/x_tweets.json': {
+        'Apple': {'1': article('Apple shares surge'), '2': article('Apple stock falls'), '3': article('Apple event today')},
+        'Tesla': {'1': article('Tesla rally', 'record growth'), '2': article('Tesla recall', 'lawsuit and loss'),
+                  '3': article('Tesla loss'), '4': article('Tesla growth'), '5': article('Tesla surge'),
+                  '6': article('Tesla falls')},
+    },
+    'data/yf_news.json': {
+        'Apple': {'1': article('Apple growth', 'strong profit'), '2': article('Apple lawsuit'),
+                  '3': article('Apple profit'), '4': article('Apple news'), '5': article('Apple falls', 'loss'),
+                  '6': article('Apple surge'), '7': article('Apple recall')},
+    },
+    'data/google_news.json': {
+        'Tesla': {'1': article('Tesla profit'), '2': article('Tesla loss'), '3': article('Tesla recall')},
+        'Nvidia': {},
+    },
+}
+
+
+@pytest.fixture
+def stored_news(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'data').mkdir()
+    # Fresh stores, matcher and article cache under tmp_path
+    monkeypatch.setattr(wj, '_stores', {})
+    monkeypatch.setattr(wj.CompanyStore, '_connections', {})
+    monkeypatch.setattr(wj.CompanyStore, '_local_writes', {})
+    monkeypatch.setattr(km, '_matcher', None)
+    monkeypatch.setattr(km, '_article_cache', None)
+    monkeypatch.setattr(km, 'ARTICLE_CACHE_PATH', str(tmp_path / 'data' / 'article_cache.json'))
+    wj.save_to_json(['surge', 'growth', 'profit', 'rally'], 'data/positive_keywords.json')
+    wj.save_to_json(['falls', 'loss', 'lawsuit', 'recall'], 'data/negative_keywords.json')
+    for path, news in NEWS.items():
+        wj.save_to_json(news, path)
+    return company_analyzer.CompanyAnalyzer.__new__(company_analyzer.CompanyAnalyzer)
+
+
+def test_batch_metrics_match_single_company_metrics(stored_news):
+    analyzer = stored_news
+    companies = ['Apple', 'Tesla', 'Nvidia', 'Unknown']
+    batch = analyzer.get_all_companies_sentiment_metrics(companies)
+    assert batch == {company: analyzer.get_single_company_sentiment_metrics(company) for company in companies}
+    # Rounded to two significant figures (1/3, 2/7, ...), empty sources left out
+    assert batch['Apple'] == {'P_X': 0.33, 'N_X': 0.33, 'sample_X': 3,
+                              'P_Y': 0.43, 'N_Y': 0.43, 'sample_Y': 7}
+    assert batch['Tesla']['P_G'] == 0.33 and batch['Tesla']['sample_X'] == 6
+    assert batch['Nvidia'] == {} and batch['Unknown'] == {}
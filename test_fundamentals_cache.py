@@ -0,0 +1,89 @@
+import time
+from fundamentals_cache import FundamentalsCache
+
+
+class FakeInfo:
+    def __init__(self):
+        self.calls = 0
+        self.market_cap = 100
+
+    def __call__(self, ticker):
+        self.calls += 1
+        return {'shortName': 'Apple', 'sector': 'Technology', 'marketCap': self.market_cap}
+
+
+def test_known_ticker_is_served_from_cache(tmp_path):
+    fetch = FakeInfo()
+    path = str(tmp_path / 'fundamentals.json')
+    cache = FundamentalsCache(path=path, fetch=fetch)
+    info = cache.get_info('aapl')
+    assert info == {'shortName': 'Apple', 'sector': 'Technology', 'marketCap': 100}
+    assert cache.get_info('AAPL', ('shortName',)) == {'shortName': 'Apple'}
+    # Persisted: a new process does not call the source again
+    assert FundamentalsCache(path=path, fetch=fetch).get_info('AAPL')['sector'] == 'Technology'
+    assert fetch.calls == 1
+
+
+def test_stale_fields_refresh_in_background(tmp_path):
+    fetch = FakeInfo()
+    cache = FundamentalsCache(path=str(tmp_path / 'fundamentals.json'), fetch=fetch,
+                              ttls={'shortName': None, 'marketCap': 0.05, 'sector': None})
+    cache.get_info('AAPL')
+    fetch.market_cap = 200
+    time.sleep(0.1)
+    # Identity never expires: no refresh
+    assert cache.get_info('AAPL', ('shortName',)) == {'shortName': 'Apple'}
+    assert fetch.calls == 1
+    # Stale market cap is returned immediately, then refreshed
+    assert cache.get_info('AAPL', ('marketCap',)) == {'marketCap': 100}
+    deadline = time.time() + 2
+    while (fetch.calls < 2 or cache._refreshing) and time.time() < deadline:
+        time.sleep(0.01)
+    assert cache.get_info('AAPL', ('marketCap',)) == {'marketCap': 200}
+
+
+def test_missing_values_are_retried(tmp_path, monkeypatch):
+    import fundamentals_cache
+    answers = [{}, {'shortName': 'Apple', 'marketCap': 100}, {}]
+
+    def fetch(ticker):
+        return answers.pop(0) if answers else {}
+
+    cache = FundamentalsCache(path=str(tmp_path / 'fundamentals.json'), fetch=fetch,
+                              ttls={'shortName': None, 'marketCap': 60})
+    # Rate-limited first answer: nothing known yet
+    assert cache.get_info('AAPL') == {}
+    monkeypatch.setattr(fundamentals_cache, 'MISSING_RETRY', 0)
+    cache.get_info('AAPL')  # stale: refreshed in the background
+    deadline = time.time() + 2
+    while cache.get_info('AAPL', ('shortName',)) != {'shortName': 'Apple'} and time.time() < deadline:
+        time.sleep(0.01)
+    assert cache.get_info('AAPL', ('shortName',)) == {'shortName': 'Apple'}
+    # An empty answer does not erase known values
+    cache.refresh('AAPL')
+    assert cache.get_info('AAPL', ('shortName',)) == {'shortName': 'Apple'}
+
+
+def test_unreported_known_value_is_retried_on_schedule(tmp_path, monkeypatch):
+    import fundamentals_cache
+    answers = [{'shortName': 'Apple', 'marketCap': 100}]
+    calls = []
+
+    def fetch(ticker):
+        calls.append(ticker)
+        return answers.pop(0) if answers else {}
+
+    cache = FundamentalsCache(path=str(tmp_path / 'fundamentals.json'), fetch=fetch,
+                              ttls={'shortName': None, 'marketCap': 60})
+    cache.get_info('AAPL')
+    cache.refresh('AAPL')  # the source stops reporting the fields
+    assert len(calls) == 2
+    # Kept and checked just now: no new fetch on every call
+    for _ in range(5):
+        assert cache.get_info('AAPL') == {'shortName': 'Apple', 'marketCap': 100}
+    assert len(calls) == 2 and not cache._refreshing
+    # After MISSING_KEEP the kept values are dropped
+    monkeypatch.setattr(fundamentals_cache, 'MISSING_KEEP', 0)
+    time.sleep(0.01)
+    cache.refresh('AAPL')
+    assert cache.get_info('AAPL') == {}
@@ -0,0 +1,96 @@
+import math
+import random
+from datetime import date, timedelta
+import pytest
+from indicators import IndicatorEngine, pandas_indicators
+
+
+def random_bars(days, seed=7):
+    """Business-day closes with a few intraday revisions of the last bar."""
+    rng = random.Random(seed)
+    bars, revisions = [], []
+    day, price = date(2023, 1, 2), 100.0
+    for i in range(days):
+        price *= 1 + rng.gauss(0, 0.02)
+        bars.append((day, price, 1000.0 + i))
+        if i % 9 == 4:
+            revisions.append((len(bars) - 1, price * (1 + rng.choice((-0.04, 0.04)))))
+        day += timedelta(days=1 if day.weekday() < 4 else 3)
+    return bars, revisions
+
+
+def feed(engine, bars, revisions):
+    """Feed bars one at a time, revising some of them like intraday refreshes."""
+    revised = dict(revisions)
+    final = []
+    for i, (day, close, volume) in enumerate(bars):
+        final.append((day, close, volume))
+        snapshot = engine.update('TEST', [b[0] for b in final], [b[1] for b in final], [b[2] for b in final])
+        if i in revised:
+            final[-1] = (day, revised[i], volume)
+            snapshot = engine.update('TEST', [b[0] for b in final], [b[1] for b in final], [b[2] for b in final])
+    return snapshot, final
+
+
+def assert_close(actual, expected):
+    for key, value in expected.items():
+        if isinstance(value, float) and math.isnan(value):
+            assert math.isnan(actual[key]), key
+        else:
+            assert actual[key] == pytest.approx(value, rel=1e-9, abs=1e-9), key
+
+
+def test_engine_matches_naive_window():
+    snapshot, final = feed(IndicatorEngine(), *random_bars(400))
+    cutoff = final[-1][0] - timedelta(days=365)
+    closes = [close for day, close, _ in final if day >= cutoff]
+    deltas = [closes[i] - closes[i - 1] for i in range(len(closes) - 14, len(closes))]
+    gain = sum(max(d, 0) for d in deltas) / 14
+    loss = sum(max(-d, 0) for d in deltas) / 14
+    mean_20 = sum(closes[-20:]) / 20
+    std_20 = math.sqrt(sum((c - mean_20) ** 2 for c in closes[-20:]) / 19)
+    assert_close(snapshot, {
+        'current_price': closes[-1],
+        'ma_20': mean_20,
+        'ma_200': sum(closes[-200:]) / 200,
+        'volatility': std_20,
+        'rsi': 100 - 100 / (1 + gain / loss),
+        '52_week_high': max(closes),
+        '52_week_low': min(closes),
+        'month_return': (closes[-1] - closes[-22]) / closes[-22] * 100,
+    })
+
+
+def test_engine_matches_pandas_implementation():
+    pd = pytest.importorskip('pandas')
+    for days in (30, 260, 400):
+        snapshot, final = feed(IndicatorEngine(), *random_bars(days, seed=days))
+        hist = pd.DataFrame({'Close': [b[1] for b in final], 'Volume': [b[2] for b in final]},
+                            index=pd.DatetimeIndex([pd.Timestamp(b[0]) for b in final]))
+        hist = hist[hist.index >= hist.index[-1] - pd.Timedelta(days=365)]
+        expected = {key: float(value) for key, value in pandas_indicators(hist).items()}
+        assert_close(snapshot, expected)
+
+
+def test_engine_rebuilds_when_history_is_rewritten():
+    bars, _ = random_bars(300)
+    engine = IndicatorEngine()
+    dates, closes, volumes = zip(*bars)
+    engine.update('TEST', dates, closes, volumes, revision=1)
+    # 4:1 split re-adjusts every stored close; same dates, new revision
+    split = [close / 4 for close in closes]
+    snapshot = engine.update('TEST', dates, split, volumes, revision=2)
+    assert_close(snapshot, IndicatorEngine().update('TEST', dates, split, volumes))
+    assert snapshot['52_week_high'] == pytest.approx(max(split[-len(engine.states['TEST'].bars):]))
+
+
+def test_engine_rebuilds_when_another_process_rewrote_the_history():
+    # The daemon's engine was fed the old basis; the nightly run re-adjusted the
+    # shared files, so this process sees new closes without a revision change
+    bars, _ = random_bars(300)
+    dates, closes, volumes = zip(*bars)
+    engine = IndicatorEngine()
+    engine.update('TEST', dates[:-1], closes[:-1], volumes[:-1])
+    split = [close / 4 for close in closes]
+    snapshot = engine.update('TEST', dates, split, volumes)
+    assert_close(snapshot, IndicatorEngine().update('TEST', dates, split, volumes))
@@ -0,0 +1,60 @@
+import json
+import keyword_matcher as km
+
+
+def naive_scores(positive, negative, text):
+    return (sum(1 for word in positive if word in text), sum(1 for word in negative if word in text))
+
+
+def test_matches_substring_semantics():
+    positive = ['up', 'upgrade', 'gain', 'gains', 'all-time high', 'high', '🚀', 'up']
+    negative = ['down', 'downgrade', 'grade', 'lawsuit', 'sell-off']
+    matcher = km.SentimentMatcher(positive, negative)
+    texts = [
+        'analysts upgrade nvda to an all-time high 🚀',
+        'supporting gains; no downgrade yet',
+        'sell-off after lawsuit',
+        '',
+    ]
+    for text in texts:
+        assert matcher.analyze(text)[:2] == naive_scores(positive, negative, text)
+
+
+def test_matches_repo_keywords_on_stored_news():
+    positive = [w.lower() for w in json.load(open('data/positive_keywords.json'))]
+    negative = [w.lower() for w in json.load(open('data/negative_keywords.json'))]
+    matcher = km.SentimentMatcher(positive, negative)
+    news = json.load(open('data/yf_news.json'))
+    for articles in news.values():
+        for article in articles.values():
+            text = (article['title'] + ' ' + article['summary']).lower()
+            pos_score, neg_score, matched_pos, matched_neg = matcher.analyze(text)
+            assert (pos_score, neg_score) == naive_scores(positive, negative, text)
+            assert set(matched_pos) == {w for w in positive if w in text}
+            assert set(matched_neg) == {w for w in negative if w in text}
+
+
+def test_persistent_lru_cache_evicts_and_persists(tmp_path):
+    from disk_cache import PersistentLRUCache
+    path = str(tmp_path / 'cache.json')
+    cache = PersistentLRUCache(path, max_entries=2)
+    cache.put('a', [1, 0])
+    cache.put('b', [0, 1])
+    assert cache.get('a') == [1, 0]
+    cache.put('c', [0, 0])  # evicts 'b', the least recently used
+    assert cache.get('b') is None
+    cache.flush()
+    reloaded = PersistentLRUCache(path, max_entries=2)
+    assert reloaded.get('a') == [1, 0] and reloaded.get('c') == [0, 0]
+    assert cache.stats()['evictions'] == 1
+
+
+def test_score_text_is_keyed_by_keyword_version(tmp_path, monkeypatch):
+    monkeypatch.setattr(km, 'ARTICLE_CACHE_PATH', str(tmp_path / 'cache.json'))
+    monkeypatch.setattr(km, '_article_cache', None)
+    first = km.SentimentMatcher(['surge'], ['drop'])
+    second = km.SentimentMatcher(['drop'], ['surge'])
+    assert km.score_text('shares surge', first)[:2] == (1, 0)
+    assert km.score_text('shares surge', first)[:2] == (1, 0)
+    assert km.get_article_cache().hits == 1
+    assert km.score_text('shares surge', second)[:2] == (0, 1)
@@ -0,0 +1,50 @@
+import pytest
+import llm_cache
+from disk_cache import PersistentLRUCache
+
+
+def test_make_key_normalizes_text():
+    key = llm_cache.make_key('llama2:7b', 'v1', 'Tariffs  on\nsteel')
+    assert key == llm_cache.make_key('llama2:7b', 'v1', ' tariffs on steel ')
+    assert key != llm_cache.make_key('llama2:7b', 'v2', 'Tariffs on steel')
+    assert key != llm_cache.make_key('mistral', 'v1', 'Tariffs on steel')
+
+
+def test_generate_is_served_from_cache(tmp_path, monkeypatch):
+    pytest.importorskip('requests')
+    import ollama_config
+
+    calls = []
+
+    class Response:
+        status_code = 200
+
+        def json(self):
+            return {'response': '{"political_uncertainty_score": 7}', 'context': [1, 2, 3]}
+
+    def fake_post(url, json=None, timeout=None):
+        calls.append(json)
+        return Response()
+
+    cache = PersistentLRUCache(str(tmp_path / 'llm.json'), max_entries=10)
+    client = ollama_config.OllamaClient(response_cache=cache)
+    monkeypatch.setattr(client.session, 'post', fake_post)
+    key = llm_cache.make_key('llama2:7b', 'v1', 'article')
+    first = client.generate('llama2:7b', 'prompt about article', cache_key=key)
+    second = client.generate('llama2:7b', 'prompt about  ARTICLE', cache_key=key)
+    assert len(calls) == 1
+    assert second == {'response': first['response']}
+    assert cache.stats()['hits'] == 1
+
+
+def test_persistent_cache_bypasses_json_cache(tmp_path):
+    import working_wjson as wj
+    path = str(tmp_path / 'llm.json')
+    cache = PersistentLRUCache(path, max_entries=10)
+    cache.put('a', {'response': 'x'})
+    cache.flush()
+    reloaded = PersistentLRUCache(path, max_entries=10)
+    assert reloaded.get('a') == {'response': 'x'}
+    # Neither the write nor the read keeps a second copy in working_wjson
+    assert wj.cache_stats()['files'].get(path) is None
+    assert all(not cached.endswith('llm.json') for cached in wj._json_cache)
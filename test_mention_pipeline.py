@@ -0,0 +1,98 @@
+import threading
+import time
+import mention_pipeline
+from mention_pipeline import MentionJob, MentionPipeline
+
+
+class Mention:
+    def __init__(self, id):
+        self.id = id
+
+
+class RateLimited(Exception):
+    def __init__(self, reset):
+        super().__init__('429 Too Many Requests')
+        self.response = type('Response', (), {'status_code': 429, 'headers': {'x-rate-limit-reset': str(reset)}})()
+
+
+class FakeX:
+    """Stand-in for tweepy.Client: records replies, can answer 429 to the first ones."""
+    def __init__(self, rate_limited=0):
+        self.rate_limited = rate_limited
+        self.attempts = 0
+        self.posts = []
+
+    def create_tweet(self, in_reply_to_tweet_id, text):
+        self.attempts += 1
+        if self.rate_limited:
+            self.rate_limited -= 1
+            raise RateLimited(int(time.time()))
+        self.posts.append((time.monotonic(), in_reply_to_tweet_id, text))
+
+
+class FakeTwitterClient:
+    """Stand-in for TwitterClient: analyses take `delay` seconds and are tracked per ticker."""
+    def __init__(self, delay=0.1, rate_limited=0):
+        self.client = FakeX(rate_limited)
+        self.delay = delay
+        self.running = {}
+        self.overlaps = 0
+        self.max_running = 0
+        self._lock = threading.Lock()
+
+    def get_mention_response(self, market_open, authorized, company_ticker, mention, username, text):
+        with self._lock:
+            self.running[company_ticker] = self.running.get(company_ticker, 0) + 1
+            if self.running[company_ticker] > 1:
+                self.overlaps += 1
+            self.max_running = max(self.max_running, sum(self.running.values()))
+        time.sleep(self.delay)
+        with self._lock:
+            self.running[company_ticker] -= 1
+        return f"{company_ticker} for @{username}", f"[OK] @{username}"
+
+
+def job(n, ticker):
+    return MentionJob(Mention(n), f"user{n}", f"${ticker}?", ticker, authorized=True, market_open=True)
+
+
+def run(pipeline, jobs, timeout=5):
+    pipeline.start()
+    for j in jobs:
+        pipeline.submit(j)
+    deadline = time.time() + timeout
+    while pipeline.pending() and time.time() < deadline:
+        time.sleep(0.01)
+    assert pipeline.pending() == 0
+
+
+def test_same_ticker_is_analyzed_one_at_a_time(tmp_path):
+    client = FakeTwitterClient(delay=0.05)
+    pipeline = MentionPipeline(client, analysis_workers=4, post_interval=0.001, lockfile=str(tmp_path / 'bot.lock'))
+    run(pipeline, [job(n, 'AAPL') for n in range(4)])
+    assert client.overlaps == 0
+    assert sorted(post[1] for post in client.client.posts) == [0, 1, 2, 3]
+
+
+def test_different_tickers_run_concurrently(tmp_path):
+    client = FakeTwitterClient(delay=0.2)
+    pipeline = MentionPipeline(client, analysis_workers=4, post_interval=0.001, lockfile=str(tmp_path / 'bot.lock'))
+    start = time.monotonic()
+    run(pipeline, [job(n, ticker) for n, ticker in enumerate(('AAPL', 'MSFT', 'TSLA', 'NVDA'))])
+    assert client.max_running > 1
+    # Serially this would take 4 * 0.2 s
+    assert time.monotonic() - start < 0.6
+
+
+def test_posts_are_paced_and_429_is_requeued(tmp_path, monkeypatch):
+    monkeypatch.setattr(mention_pipeline, 'RATE_LIMIT_MIN_WAIT', 0)
+    client = FakeTwitterClient(delay=0, rate_limited=1)
+    pipeline = MentionPipeline(client, analysis_workers=2, post_interval=0.1, lockfile=str(tmp_path / 'bot.lock'))
+    run(pipeline, [job(n, ticker) for n, ticker in enumerate(('AAPL', 'MSFT', 'TSLA'))])
+    posts = client.client.posts
+    # The rate-limited reply is posted on retry, not dropped
+    assert client.client.attempts == 4
+    assert sorted(post[1] for post in posts) == [0, 1, 2]
+    gaps = [later[0] - earlier[0] for earlier, later in zip(posts, posts[1:])]
+    assert all(gap >= 0.09 for gap in gaps)
+    assert not (tmp_path / 'bot.lock').exists()
@@ -0,0 +1,70 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+
+pytest.importorskip('aiohttp')
+pytest.importorskip('requests')
+import ollama_async
+
+
+@pytest.fixture
+def fake_ollama():
+    """Local HTTP server answering /api/generate like Ollama; the first request fails with 503."""
+    state = {'requests': 0, 'in_flight': 0, 'max_in_flight': 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+            with lock:
+                state['requests'] += 1
+                first = state['requests'] == 1
+                state['in_flight'] += 1
+                state['max_in_flight'] = max(state['max_in_flight'], state['in_flight'])
+            try:
+                if first:
+                    self.send_response(503)
+                    self.end_headers()
+                    return
+                threading.Event().wait(0.05)
+                payload = json.dumps({'response': body['prompt'].upper(), 'done': True}).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+            finally:
+                with lock:
+                    state['in_flight'] -= 1
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", state
+    server.shutdown()
+
+
+def test_gather_generate_retries_and_limits_concurrency(fake_ollama):
+    base_url, state = fake_ollama
+
+    async def run():
+        async with ollama_async.AsyncOllamaClient(base_url, max_concurrency=2, backoff=0.01) as client:
+            return await client.gather_generate('llama2:7b', [f'prompt {n}' for n in range(6)])
+
+    results = asyncio.run(run())
+    assert [result['response'] for result in results] == [f'PROMPT {n}' for n in range(6)]
+    assert state['requests'] == 7  # one retried after the 503
+    assert state['max_in_flight'] <= 2
+
+
+def test_unreachable_server_returns_none():
+    async def run():
+        async with ollama_async.AsyncOllamaClient('http://127.0.0.1:9', retries=1, backoff=0.01, timeout=2) as client:
+            return await client.generate('llama2:7b', 'prompt')
+
+    assert asyncio.run(run()) is None
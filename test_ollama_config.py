@@ -0,0 +1,91 @@
+import json
+import pytest
+
+pytest.importorskip('requests')
+import ollama_config
+
+
+def test_json_object_end():
+    assert ollama_config.json_object_end('Sure! {"a": 1} and more') == len('Sure! {"a": 1}')
+    assert ollama_config.json_object_end('{"a": {"b": "}"}') == -1
+    assert ollama_config.json_object_end('{"a": "x\\"}"}') == len('{"a": "x\\"}"}')
+    assert ollama_config.json_object_end('no json here') == -1
+
+
+class StreamResponse:
+    status_code = 200
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.read = 0
+        self.closed = False
+
+    def iter_lines(self):
+        for chunk in self.chunks:
+            self.read += 1
+            yield json.dumps({'response': chunk, 'done': False}).encode()
+        yield json.dumps({'response': '', 'done': True}).encode()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.closed = True
+
+
+def test_generate_json_stops_when_object_closes(monkeypatch):
+    response = StreamResponse(['Here: {"political_uncertainty_score"', ': 6}', ' Explanation', ' goes on', ' and on'])
+    client = ollama_config.OllamaClient(keep_alive='10m')
+    sent = []
+
+    def fake_post(url, json=None, timeout=None, stream=False):
+        sent.append(json)
+        return response
+
+    monkeypatch.setattr(client.session, 'post', fake_post)
+    result = client.generate_json('llama2:7b', 'prompt')
+    assert result == {'response': 'Here: {"political_uncertainty_score": 6}', 'done': False}
+    assert response.read == 2 and response.closed
+    assert sent[0]['stream'] is True and sent[0]['keep_alive'] == '10m'
+
+
+def test_is_available_is_cached(monkeypatch):
+    client = ollama_config.OllamaClient(health_ttl=60)
+    probes = []
+
+    class Response:
+        status_code = 200
+
+    def fake_get(url, timeout=None):
+        probes.append(url)
+        return Response()
+
+    monkeypatch.setattr(client.session, 'get', fake_get)
+    assert client.is_available() and client.is_available()
+    assert len(probes) == 1
+    assert client.is_available(refresh=True)
+    assert len(probes) == 2
+
+
+def test_format_and_options_are_sent(monkeypatch):
+    client = ollama_config.OllamaClient(keep_alive='5m')
+    sent = []
+
+    class Response:
+        status_code = 200
+
+        def json(self):
+            return {'response': '{}', 'done': True}
+
+    def fake_post(url, json=None, timeout=None):
+        sent.append(json)
+        return Response()
+
+    monkeypatch.setattr(client.session, 'post', fake_post)
+    schema = {'type': 'object'}
+    client.generate('llama2:7b', 'prompt', format=schema, options={'num_predict': 50})
+    assert sent[-1]['format'] == schema and sent[-1]['options'] == {'num_predict': 50}
+    monkeypatch.setitem(ollama_config.OLLAMA_CONFIG, 'structured_outputs', False)
+    client.generate('llama2:7b', 'prompt', format=schema)
+    assert sent[-1]['format'] == 'json' and 'options' not in sent[-1]
+    assert ollama_config.default_cache_key('m', 'p') != ollama_config.default_cache_key('m', 'p', format=schema)
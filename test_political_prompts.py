@@ -0,0 +1,68 @@
+from political_prompts import (ANALYSIS_FIELDS, BATCH_KEY, ParseStats, analysis_schema, batch_schema, build_batch_prompt,
+                               parse_batch_response, validate_analysis, validate_uncertainty)
+
+
+def test_batch_prompt_numbers_articles():
+    prompt = build_batch_prompt(['Tariffs  on\nsteel', 'Fed holds rates'])
+    assert '[1] Tariffs on steel' in prompt and '[2] Fed holds rates' in prompt
+    assert 'exactly 2 objects' in prompt
+
+
+def test_parse_json_array_by_id():
+    text = 'Sure! [{"id": 2, "political_uncertainty_score": 3, "justification": "b"},' \
+           ' {"id": 1, "political_uncertainty_score": "12", "justification": "a"}]'
+    items = parse_batch_response(text, 2)
+    assert items == [{'political_uncertainty_score': 10, 'justification': 'a'},
+                     {'political_uncertainty_score': 3, 'justification': 'b'}]
+
+
+def test_parse_falls_back_per_item():
+    # Broken JSON: the second item is recovered from its own chunk of text
+    text = '[{"id": 1, "political_uncertainty_score": 4, "justification": "x"}, {"id": 2, "political_uncertainty_score": 7, "justification": "y"'
+    items = parse_batch_response(text, 3)
+    assert [item['political_uncertainty_score'] for item in items[:2]] == [4, 7]
+    assert items[2] is None
+    plain = '1. Political uncertainty score: 6\nJustification: tariffs\n2) political uncertainty score: 2\n'
+    items = parse_batch_response(plain, 2)
+    assert [item['political_uncertainty_score'] for item in items] == [6, 2]
+
+
+def test_batch_items_are_counted_strict_or_fallback():
+    stats = ParseStats()
+    strict = '{"%s": [{"id": 1, "political_uncertainty_score": 4, "justification": "x"},' \
+             ' {"id": 2, "political_uncertainty_score": "7", "justification": "y"}]}' % BATCH_KEY
+    items = parse_batch_response(strict, 3, stats=stats)
+    assert [item and item['political_uncertainty_score'] for item in items] == [4, 7, None]
+    # The string score and the missing item are not strict; the missing one is not counted at all
+    assert stats.snapshot()['politic_uncertity_batch'] == {'strict': 1, 'fallback': 1, 'fallback_rate': 0.5}
+    parse_batch_response('Sure! [{"id": 1, "political_uncertainty_score": 4, "justification": "x"}]', 1, stats=stats)
+    assert stats.snapshot()['politic_uncertity_batch']['fallback'] == 2
+    schema = batch_schema(3)['properties'][BATCH_KEY]
+    assert schema['minItems'] == schema['maxItems'] == 3
+    assert schema['items']['required'] == ['id', 'political_uncertainty_score', 'justification']
+
+
+def test_validate_uncertainty_is_strict():
+    assert validate_uncertainty(' {"political_uncertainty_score": 7, "justification": "tariffs "}\n') == \
+        {'political_uncertainty_score': 7, 'justification': 'tariffs'}
+    assert validate_uncertainty('Sure: {"political_uncertainty_score": 7, "justification": "x"}') is None
+    assert validate_uncertainty('{"political_uncertainty_score": 11, "justification": "x"}') is None
+    assert validate_uncertainty('{"political_uncertainty_score": "7", "justification": "x"}') is None
+    assert validate_uncertainty('{"political_uncertainty_score": 7}') is None
+
+
+def test_validate_analysis_checks_every_field():
+    answer = '{"political_sentiment": "Negative", "uncertainty_level": "high", "confidence_score": 0.8, "key_political_topics": ["tariffs"]}'
+    assert validate_analysis(answer, 'political_sentiment')['political_sentiment'] == 'negative'
+    assert validate_analysis(answer.replace('0.8', '1.5'), 'political_sentiment') is None
+    assert validate_analysis(answer, 'combined') is None
+    schema = analysis_schema('combined')
+    assert set(schema['required']) == set(ANALYSIS_FIELDS['combined'])
+    assert analysis_schema('free_text') is None
+
+
+def test_parse_stats_fallback_rate():
+    stats = ParseStats()
+    for strict in (True, True, True, False):
+        stats.record('politic_uncertity', strict)
+    assert stats.snapshot() == {'politic_uncertity': {'strict': 3, 'fallback': 1, 'fallback_rate': 0.25}}
@@ -0,0 +1,65 @@
+import json
+import pytest
+
+pytest.importorskip('requests')
+politics = pytest.importorskip('politics', exc_type=ImportError)
+
+
+class FakeOllama:
+    """Stand-in for OllamaClient: answers from a dict of summary -> score, None when down."""
+    response_cache = None
+
+    def __init__(self, scores=None):
+        self.scores = scores or {}
+
+    def generate_json(self, model, prompt, cache_key=None, format=None, options=None):
+        for summary, score in self.scores.items():
+            if summary in prompt:
+                return {'response': json.dumps({'political_uncertainty_score': score, 'justification': 'x'})}
+        return None
+
+
+def make_analyzer(client):
+    analyzer = politics.PoliticalUncertaintyAnalyzer.__new__(politics.PoliticalUncertaintyAnalyzer)
+    analyzer.use_llm = True
+    analyzer._llm_ready = True
+    analyzer._llm_client = None
+    analyzer._ollama_client = client
+    return analyzer
+
+
+def test_unreachable_ollama_is_a_failure_not_a_zero(tmp_path):
+    checkpoint = str(tmp_path / 'checkpoint.json')
+    news = {'Tesla': [{'summary': 'tariffs on cars'}, {'summary': 'new factory'}]}
+    scores = make_analyzer(FakeOllama()).score_articles(news, checkpoint_path=checkpoint, batch_size=1)
+    assert scores == {'Tesla': [None, None]}
+    # Kept for the next run, without entries for the failed articles
+    with open(checkpoint) as f:
+        assert json.load(f) == {'Tesla': {}}
+
+
+def test_partial_failure_keeps_finished_scores(tmp_path):
+    checkpoint = str(tmp_path / 'checkpoint.json')
+    news = {'Tesla': [{'summary': 'tariffs on cars'}, {'summary': 'new factory'}]}
+    scores = make_analyzer(FakeOllama({'tariffs on cars': 8})).score_articles(news, checkpoint_path=checkpoint, batch_size=1)
+    assert scores == {'Tesla': [8, None]}
+    # The rerun only sends the missing article
+    client = FakeOllama({'new factory': 3})
+    assert make_analyzer(client).score_articles(news, checkpoint_path=checkpoint, batch_size=1) == {'Tesla': [8, 3]}
+    assert not (tmp_path / 'checkpoint.json').exists()
+
+
+def test_batch_prompt_uses_schema_and_token_cap():
+    political_prompts = pytest.importorskip('political_prompts')
+    calls = []
+
+    class BatchOllama(FakeOllama):
+        def generate_json(self, model, prompt, cache_key=None, format=None, options=None):
+            calls.append((format, options))
+            items = [{'id': 1, 'political_uncertainty_score': 8, 'justification': 'a'},
+                     {'id': 2, 'political_uncertainty_score': 3, 'justification': 'b'}]
+            return {'response': json.dumps({political_prompts.BATCH_KEY: items})}
+
+    results = make_analyzer(BatchOllama()).politic_uncertity_batch(['tariffs on cars', 'new factory'])
+    assert [result['political_uncertainty_score'] for result in results] == [8, 3]
+    assert calls == [(political_prompts.batch_schema(2), {'num_predict': 2 * political_prompts.UNCERTAINTY_NUM_PREDICT})]
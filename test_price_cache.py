@@ -0,0 +1,94 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pd = pytest.importorskip('pandas')
+from price_cache import OVERLAP_BARS, PriceHistoryCache
+
+
+class FakeSource:
+    """Stand-in for yfinance: serves bars from a fixed frame and records calls."""
+    def __init__(self, frame):
+        self.frame = frame
+        self.calls = []
+
+    def __call__(self, ticker, start=None, period=None):
+        self.calls.append((ticker, start, period))
+        if start is not None:
+            return self.frame[self.frame.index >= pd.Timestamp(start)]
+        return self.frame
+
+
+def make_frame(days, start='2024-01-01'):
+    index = pd.bdate_range(start, periods=days)
+    close = np.linspace(100, 200, days)
+    return pd.DataFrame({'Open': close, 'High': close + 1, 'Low': close - 1,
+                         'Close': close, 'Volume': np.arange(days, dtype=float)}, index=index)
+
+
+def test_history_fetches_only_the_tail(tmp_path):
+    full = make_frame(300)
+    source = FakeSource(full.iloc[:290])
+    cache = PriceHistoryCache(root=str(tmp_path), source=source, refresh_seconds=0)
+    first = cache.history('aapl', period='1y')
+    assert first['Close'].iloc[-1] == full['Close'].iloc[289]
+    # New bars arrive, and the last stored bar changed (intraday snapshot)
+    changed = full.copy()
+    changed.iloc[289, changed.columns.get_loc('Close')] = 1.0
+    source.frame = changed
+    second = cache.history('AAPL', period='1y')
+    # The tail starts OVERLAP_BARS before the last stored bar
+    assert source.calls[-1][1] == str(full.index[289 - OVERLAP_BARS].date())
+    assert second['Close'].iloc[-1] == full['Close'].iloc[-1]
+    assert second.loc[full.index[289], 'Close'] == 1.0
+    assert len(second) == len(changed[changed.index >= changed.index[-1] - pd.Timedelta(days=365)])
+
+
+def test_history_served_from_disk_while_fresh(tmp_path):
+    source = FakeSource(make_frame(300))
+    cache = PriceHistoryCache(root=str(tmp_path), source=source, refresh_seconds=3600)
+    cache.history('MSFT')
+    calls = len(source.calls)
+    again = PriceHistoryCache(root=str(tmp_path), source=source, refresh_seconds=3600).history('MSFT')
+    assert len(source.calls) == calls
+    assert not again.empty
+
+
+def test_update_many_uses_one_batch_call(tmp_path):
+    frames = {'AAPL': make_frame(300), 'MSFT': make_frame(300, start='2024-01-03')}
+    batch_calls = []
+
+    def batch_source(tickers, start=None, period=None):
+        batch_calls.append((tuple(tickers), start, period))
+        if start is None:
+            return frames
+        return {ticker: frame[frame.index >= pd.Timestamp(start)] for ticker, frame in frames.items()}
+
+    cache = PriceHistoryCache(root=str(tmp_path), source=FakeSource(make_frame(1)),
+                              refresh_seconds=0, batch_source=batch_source)
+    bars = cache.bars_many(['aapl', 'MSFT'])
+    assert batch_calls == [(('AAPL', 'MSFT'), None, '1y')]
+    assert bars['MSFT']['Close'][-1] == frames['MSFT']['Close'].iloc[-1]
+    cache.bars_many(['AAPL', 'MSFT'])
+    # Stale histories are refreshed together from the oldest overlap start
+    assert batch_calls[-1] == (('AAPL', 'MSFT'), str(frames['AAPL'].index[-1 - OVERLAP_BARS].date()), None)
+    assert len(batch_calls) == 2
+
+
+def test_split_readjustment_refetches_the_whole_history(tmp_path):
+    full = make_frame(300)
+    source = FakeSource(full.iloc[:290])
+    cache = PriceHistoryCache(root=str(tmp_path), source=source, refresh_seconds=0)
+    cache.history('NVDA')
+    revision = cache.revision('NVDA')
+    # 4:1 split: the source now serves the whole history divided by 4
+    split = full.copy()
+    split[['Open', 'High', 'Low', 'Close']] /= 4
+    source.frame = split
+    history = cache.history('NVDA')
+    assert np.allclose(history['Close'].to_numpy(), split['Close'].iloc[-len(history):].to_numpy())
+    assert history['Close'].max() == split['Close'].max()
+    assert cache.revision('NVDA') > revision
+    # A plain tail update only extends the history
+    revision = cache.revision('NVDA')
+    cache.history('NVDA')
+    assert cache.revision('NVDA') == revision
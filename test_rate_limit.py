@@ -0,0 +1,12 @@
+import time
+from rate_limit import TokenBucket
+
+
+def test_token_bucket_allows_burst_then_paces():
+    bucket = TokenBucket(rate=20, capacity=2)
+    assert bucket.try_acquire() and bucket.try_acquire()
+    assert not bucket.try_acquire()
+    start = time.monotonic()
+    bucket.acquire()
+    # One token refills in 1/20 s
+    assert 0.03 <= time.monotonic() - start < 0.5
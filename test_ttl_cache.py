@@ -0,0 +1,66 @@
+import threading
+import time
+import pytest
+from ttl_cache import TTLCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_expire_per_key_ttl():
+    clock = Clock()
+    cache = TTLCache(ttl=10, clock=clock)
+    cache.put('AAPL', 'a')
+    cache.put('TSLA', 't', ttl=60)
+    clock.now = 11
+    assert cache.get('AAPL') is None and cache.get('TSLA') == 't'
+    assert cache.stats()['expirations'] == 1 and len(cache) == 1
+
+
+def test_lru_eviction_by_entries_and_bytes():
+    cache = TTLCache(max_entries=2, max_bytes=10)
+    cache.put('A', 'aaaa')
+    cache.put('B', 'bbbb')
+    cache.get('A')              # B is now the least recently used
+    cache.put('C', 'cc')
+    assert cache.get('B') is None and cache.get('A') == 'aaaa'
+    cache.put('D', 'dddddddd')  # 4 + 8 > 10 bytes: A goes too
+    assert cache.get('A') is None and cache.get('D') == 'dddddddd'
+    assert cache.stats()['evictions'] == 3
+    cache.put('E', 'x' * 11)    # larger than the whole cache: not stored
+    assert cache.get('E') is None and cache.stats()['bytes'] <= 10
+
+
+def test_get_or_compute_is_single_flight():
+    cache = TTLCache()
+    calls = []
+    started = threading.Event()
+
+    def compute():
+        calls.append(1)
+        started.set()
+        time.sleep(0.1)
+        return 'analysis'
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute('NVDA', compute))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ['analysis'] * 5 and len(calls) == 1
+    assert cache.get_or_compute('NVDA', compute) == 'analysis' and len(calls) == 1
+
+
+def test_get_or_compute_errors_are_not_cached():
+    cache = TTLCache()
+    with pytest.raises(ValueError):
+        cache.get_or_compute('X', lambda: (_ for _ in ()).throw(ValueError('boom')))
+    assert cache.get_or_compute('X', lambda: '[ERROR] later', cache_if=lambda v: not v.startswith('[ERROR]')) == '[ERROR] later'
+    assert cache.get_or_compute('X', lambda: 'ok') == 'ok'
+    assert cache.get('X') == 'ok'
@@ -0,0 +1,95 @@
+import json
+import working_wjson as wj
+
+
+def test_company_store_get_put(tmp_path):
+    legacy = tmp_path / 'yf_news.json'
+    legacy.write_text(json.dumps({'Apple': {'0': {'title': 'a'}}, 'Tesla': {}}))
+    store = wj.CompanyStore(str(legacy), db_path=str(tmp_path / 'store.sqlite3'))
+    # Legacy content is imported on first use
+    assert store.get('Apple') == {'0': {'title': 'a'}}
+    assert store.get('Nvidia', {}) == {}
+    store.put('Nvidia', {'0': {'title': 'n'}})
+    store.put('Apple', {'0': {'title': 'b'}})
+    # Updating a company keeps the original order
+    assert list(store.load().keys()) == ['Apple', 'Tesla', 'Nvidia']
+    assert store.get('Apple') == {'0': {'title': 'b'}}
+    store.delete('Tesla')
+    assert store.keys() == ['Apple', 'Nvidia']
+    store.save({'Amazon': {}})
+    assert store.load() == {'Amazon': {}}
+
+
+def test_company_store_migrates_once(tmp_path):
+    legacy = tmp_path / 'google_news.json'
+    legacy.write_text(json.dumps({'Apple': {}}))
+    db_path = str(tmp_path / 'store.sqlite3')
+    wj.CompanyStore(str(legacy), db_path=db_path).delete('Apple')
+    # Reopening the store must not re-import the legacy file
+    assert wj.CompanyStore(str(legacy), db_path=db_path).load() == {}
+
+
+
+def test_load_from_json_reparses_only_on_change(tmp_path):
+    path = tmp_path / 'companies.json'
+    path.write_text(json.dumps({'Apple': 'AAPL'}))
+    wj.clear_cache()
+    first = wj.load_from_json(str(path))
+    assert wj.load_from_json(str(path)) == first
+    stats = wj.cache_stats()
+    assert (stats['hits'], stats['misses']) == (1, 1)
+    # A different size invalidates the cached object
+    path.write_text(json.dumps({'Apple': 'AAPL', 'Tesla': 'TSLA'}))
+    assert wj.load_from_json(str(path)) == {'Apple': 'AAPL', 'Tesla': 'TSLA'}
+    # Saving writes through the cache
+    wj.save_to_json({'Nvidia': 'NVDA'}, str(path))
+    assert wj.load_from_json(str(path)) == {'Nvidia': 'NVDA'}
+    assert wj.cache_stats()['misses'] == 2
+
+
+def test_company_store_cache_sees_writes(tmp_path):
+    store = wj.CompanyStore(str(tmp_path / 'x_tweets.json'), db_path=str(tmp_path / 'store.sqlite3'))
+    assert store.get('Apple') is None
+    store.put('Apple', {'0': {}})
+    assert store.get('Apple') == {'0': {}}
+    assert store.load() == {'Apple': {'0': {}}}
+    store.put('Apple', {})
+    assert store.load() == {'Apple': {}}
+
+
+def test_save_to_json_replaces_atomically(tmp_path):
+    path = tmp_path / 'uncertity_per_company.json'
+    wj.save_to_json({'Apple': 5}, str(path), fsync='full')
+    wj.save_to_json({'Apple': 7}, str(path))
+    assert json.loads(path.read_text()) == {'Apple': 7}
+    # No temp files are left behind
+    assert [p.name for p in tmp_path.iterdir()] == ['uncertity_per_company.json']
+
+
+def test_failed_save_keeps_previous_file(tmp_path):
+    path = tmp_path / 'queries_x.json'
+    wj.save_to_json({'Apple': 'AAPL'}, str(path))
+    try:
+        wj.save_to_json({'Apple': object()}, str(path))
+    except TypeError:
+        pass
+    assert json.loads(path.read_text()) == {'Apple': 'AAPL'}
+    assert len(list(tmp_path.iterdir())) == 1
+
+
+def test_loaded_objects_are_private_copies(tmp_path):
+    path = tmp_path / 'companies.json'
+    path.write_text(json.dumps({'Apple': 'AAPL'}))
+    wj.clear_cache()
+    companies = wj.load_from_json(str(path))
+    companies['Tesla'] = 'TSLA'
+    # Not saved yet: other readers must not see the change
+    assert wj.load_from_json(str(path)) == {'Apple': 'AAPL'}
+    wj.save_to_json(companies, str(path))
+    companies['Nvidia'] = 'NVDA'
+    assert wj.load_from_json(str(path)) == {'Apple': 'AAPL', 'Tesla': 'TSLA'}
+    store = wj.CompanyStore(str(tmp_path / 'yf_news.json'), db_path=str(tmp_path / 'store.sqlite3'))
+    store.put('Apple', {'0': {'title': 'a'}})
+    store.get('Apple')['1'] = {'title': 'b'}
+    store.load()['Apple']['2'] = {}
+    assert store.get('Apple') == {'0': {'title': 'a'}}
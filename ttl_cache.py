@@ -0,0 +1,171 @@
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+# Company analyses shared by TwitterClient and TwitterFormattedAnalyzer
+ANALYSIS_TTL = int(os.getenv('XBOT_ANALYSIS_TTL', '600'))  # 10 minutes
+ANALYSIS_MAX_ENTRIES = int(os.getenv('XBOT_ANALYSIS_CACHE_ENTRIES', '256'))
+ANALYSIS_MAX_BYTES = int(os.getenv('XBOT_ANALYSIS_CACHE_BYTES', str(4 * 1024 * 1024)))
+
+
+def default_sizeof(value):
+    """Approximate size in bytes of a cached value (exact for str/bytes)."""
+    if isinstance(value, str):
+        return len(value.encode('utf-8'))
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    return sys.getsizeof(value)
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class TTLCache:
+    """
+    In-memory LRU dictionary whose entries also expire after a TTL (per
+    key, or the cache default). Bounded by max_entries and, optionally,
+    max_bytes (as measured by sizeof). get_or_compute() is single-flight:
+    concurrent callers for the same missing key wait for one computation.
+    """
+    def __init__(self, ttl=600, max_entries=1024, max_bytes=None, sizeof=None, clock=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof or default_sizeof
+        self.clock = clock or time.monotonic
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.bytes = 0
+        self._entries = OrderedDict()  # key -> (expires_at, size, value)
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def _lookup(self, key):
+        # Caller holds the lock. Returns (found, value) and counts the hit/miss.
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] <= self.clock():
+            self._remove(key)
+            self.expirations += 1
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return False, None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return True, entry[2]
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self.bytes -= size
+
+    def get(self, key, default=None):
+        with self._lock:
+            found, value = self._lookup(key)
+            return value if found else default
+
+    def put(self, key, value, ttl=None):
+        size = self.sizeof(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            # Would evict everything else and still not fit
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (self.clock() + (self.ttl if ttl is None else ttl), size, value)
+            self.bytes += size
+            self._evict()
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries
+                                 or (self.max_bytes is not None and self.bytes > self.max_bytes)):
+            key = next(iter(self._entries))
+            self._remove(key)
+            self.evictions += 1
+
+    def pop(self, key, default=None):
+        with self._lock:
+            if key not in self._entries:
+                return default
+            value = self._entries[key][2]
+            self._remove(key)
+            return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def get_or_compute(self, key, compute, ttl=None, cache_if=None):
+        """
+        Cached value for key, or compute() stored with ttl. While one thread
+        computes a key, other callers for it wait and get the same result
+        (or exception). Results rejected by cache_if(value) are returned but
+        not stored.
+        """
+        with self._lock:
+            found, value = self._lookup(key)
+            if found:
+                return value
+            flight = self._flights.get(key)
+            owner = flight is None
+            if owner:
+                flight = self._flights[key] = _Flight()
+        if not owner:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+        try:
+            flight.value = compute()
+            if cache_if is None or cache_if(flight.value):
+                self.put(key, flight.value, ttl=ttl)
+            return flight.value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': round(self.hits / total, 3) if total else 0.0,
+            }
+
+
+_analysis_cache = None
+_analysis_lock = threading.Lock()
+
+def get_company_analysis_cache():
+    """Process-wide TTLCache of formatted company analyses, keyed by ticker."""
+    global _analysis_cache
+    with _analysis_lock:
+        if _analysis_cache is None:
+            _analysis_cache = TTLCache(ttl=ANALYSIS_TTL, max_entries=ANALYSIS_MAX_ENTRIES, max_bytes=ANALYSIS_MAX_BYTES)
+        return _analysis_cache
+
+
+def cacheable_analysis(analysis):
+    """Error messages are not cached, so the next mention retries the analysis."""
+    return bool(analysis) and not str(analysis).startswith('[ERROR]')
@@ -1,9 +1,13 @@
 import tweepy
+import threading
 import time
 import get_creds
 import re
 from datetime import datetime, timedelta
 import working_wjson as wj
+from mention_pipeline import MentionJob, MentionPipeline
+import ttl_cache
+import log_utils
 
 
 #global variable for singleton
@@ -35,7 +39,7 @@ class TwitterClient:
         """
         import working_wjson as wj
         import company_analyzer as ca
-        data_total = wj.load_from_json('data/data_total_analyze.json')
+        data_total = wj.get_store('data/data_total_analyze.json')
         pol = wj.load_from_json('data/uncertity_per_company.json')
         analyzer = ca.TwitterFormattedAnalyzer()
         analysis = analyzer.format_twitter_analysis(company_name, company_ticker)
@@ -45,7 +49,7 @@ class TwitterClient:
             print(f"[DEBUG] Sentiment: {data_total.get(company_name)}")
             print(f"[DEBUG] Political: {pol.get(company_name)}")
             print(f"[DEBUG] Ticker: {company_ticker}, Name: {company_name}")
-            print(f"[DEBUG] All sentiment keys: {list(data_total.keys())}")
+            print(f"[DEBUG] All sentiment keys: {data_total.keys()}")
             print(f"[DEBUG] All political keys: {list(pol.keys())}")
             print(f"[DEBUG] --- END DATA ---")
             return None
@@ -83,66 +87,26 @@ class TwitterClient:
                 company_name = analyzer.get_company_name_from_ticker(company_ticker)
             except Exception:
                 company_name = company_ticker
-            # Add to companies.json and trigger full update
+            # Add to companies.json; the news update below does the full extraction
             updater.add_company_to_companies(company_name, company_ticker)
-            updater.update_news(company_name)
-            # After update, reload companies
-            companies = wj.load_from_json('data/companies.json')
 
-        # Always force news extraction for the requested company before analysis
-        updater.update_news(company_name)
-
-        # Wait for news to be present in at least one source before proceeding
-        import time
-        max_wait = 30  # seconds
-        wait_interval = 2
-        waited = 0
-        news_found = False
-        while waited < max_wait:
-            x_news = wj.load_from_json('data/x_tweets.json').get(company_name, {})
-            y_news = wj.load_from_json('data/yf_news.json').get(company_name, {})
-            g_news = wj.load_from_json('data/google_news.json').get(company_name, {})
-            x_count = len(x_news) if isinstance(x_news, dict) else 0
-            y_count = len(y_news) if isinstance(y_news, dict) else 0
-            g_count = len(g_news) if isinstance(g_news, dict) else 0
-            print(f"[DEBUG] News counts for {company_name}: X={x_count}, Y={y_count}, G={g_count}")
-            if x_count > 0 or y_count > 0 or g_count > 0:
-                news_found = True
-                break
-            print(f"[WAIT] No news found for {company_name} yet... {waited}/{max_wait} seconds elapsed.")
-            time.sleep(wait_interval)
-            waited += wait_interval
-
-        if not news_found:
+        # Always force news extraction for the requested company before analysis.
+        # refresh_company is synchronous and returns what it stored, so nothing is polled here;
+        # mentions of the same ticker in one scan share a single refresh.
+        update = updater.refresh_company(company_name, company_ticker)
+        counts = {fname: len(entry) if isinstance(entry, dict) else 0 for fname, entry in update['news'].items()}
+        x_count = counts.get('data/x_tweets.json', 0)
+        y_count = counts.get('data/yf_news.json', 0)
+        g_count = counts.get('data/google_news.json', 0)
+        print(f"[DEBUG] News counts for {company_name}: X={x_count}, Y={y_count}, G={g_count}")
+        if x_count == 0 and y_count == 0 and g_count == 0:
             print(f"[ERROR] No news found for {company_name} after extraction. Not posting.")
             return f"[ERROR] No news found for {company_name}. Please try again later.", f"[ERROR] No news for {company_name}."
 
-        # Check if sentiment and political data exist, else force update and wait for real data
-        waited = 0
-        updater = updater_jsons.updater_data()
-        while True:
-            data_total = wj.load_from_json('data/data_total_analyze.json')
-            pol = wj.load_from_json('data/uncertity_per_company.json')
-            print(f"[DEBUG] data_total_analyze.json keys: {list(data_total.keys())}")
-            print(f"[DEBUG] uncertity_per_company.json keys: {list(pol.keys())}")
-            missing = False
-            if company_name not in data_total:
-                print(f"[WAIT] Sentiment data missing for {company_name}, updating...")
-                updater.update_data_analyze_for_company(company_name)
-                missing = True
-            if company_name not in pol:
-                print(f"[WAIT] Political uncertainty data missing for {company_name}, updating...")
-                updater.update_political_uncertainty_for_company(company_name)
-                missing = True
-            if not missing:
-                print(f"[READY] Analysis data found for {company_name}, proceeding to post.")
-                break
-            if waited >= max_wait:
-                print(f"[ERROR] Timeout waiting for analysis data for {company_name}, using defaults.")
-                break
-            print(f"[WAIT] Waiting for analysis data for {company_name}... {waited}/{max_wait} seconds elapsed.")
-            time.sleep(wait_interval)
-            waited += wait_interval
+        if update['sentiment'] is None or update['political'] is None:
+            print(f"[ERROR] Analysis data incomplete for {company_name}, using defaults.")
+        else:
+            print(f"[READY] Analysis data found for {company_name}, proceeding to post.")
 
         # Allow authorized users 24/7 access
         if authorized:
@@ -187,7 +151,11 @@ class TwitterClient:
 
         # Only use X API for mentions and posting answers
         self.authorized_users = set(wj.load_from_json('data/authorized_users.json'))
-        self.company_analysis_cache = {}
+        # Bounded TTL+LRU cache shared with TwitterFormattedAnalyzer (see ttl_cache)
+        self.company_analysis_cache = ttl_cache.get_company_analysis_cache()
+        # Created on first use, then shared by every monitor_and_respond_mentions call
+        self._mention_pipeline = None
+        self._mention_pipeline_lock = threading.Lock()
 
         
     
@@ -322,21 +290,14 @@ class TwitterClient:
     def generate_ai_analysis(self, company_name, ticker):
         """
         Returns cached analysis for a ticker if available and fresh (10 min), else generates new and updates cache.
+        Concurrent requests for the same ticker share one generation.
         # Incluye solo noticias de Yahoo y Google News en el análisis.
         """
-        cache_key = ticker or (company_name or '').lower()
-        now = time.time()
-        # Check cache
-        if cache_key in self.company_analysis_cache:
-            ts, cached_analysis = self.company_analysis_cache[cache_key]
-            if now - ts < 600:  # 10 minutes
-                return cached_analysis
-        # Not cached or expired, generate new analysis
+        cache_key = ticker.upper() if ticker else (company_name or '').lower()
         import company_analyzer as ca
-        analysis = ca.get_company_analysis(company_name, ticker)
         # RSS/feed code removed: only Yahoo and Google News are used.
-        self.company_analysis_cache[cache_key] = (now, analysis)
-        return analysis
+        return self.company_analysis_cache.get_or_compute(
+            cache_key, lambda: ca.get_company_analysis(company_name, ticker), cache_if=ttl_cache.cacheable_analysis)
     
     def contains_company(self,text):
         # Regex para tickers como $TSLA, $AAPL (1-5 letras uppercase) fix this method
@@ -399,38 +360,23 @@ class TwitterClient:
     # - El temporizador base_sleep ajusta la frecuencia de escaneo según si el mercado está abierto o cerrado.
     #
     # Para más detalles, consulta la sección "Límites y control de uso" en el README.
+    def get_mention_pipeline(self):
+        """The started MentionPipeline of this client (one per client, so restarts do not leak threads)."""
+        with self._mention_pipeline_lock:
+            if self._mention_pipeline is None:
+                self._mention_pipeline = MentionPipeline(self)
+                self._mention_pipeline.start()
+            return self._mention_pipeline
+
     def monitor_and_respond_mentions(self):
-        import os
-        import threading
-        from contextlib import contextmanager
+        # Daemon entry point: without a configured root logger the INFO stats are dropped
+        log_utils.setup_logging()
         print("Starting monitoring for new mentions...")
         last_mention_id = None
         max_backoff = 900
 
-        # Simple file lock context manager (cross-platform, works for single machine)
-        @contextmanager
-        def file_lock(lockfile, timeout=30):
-            import time
-            start = time.time()
-            while True:
-                try:
-                    # Try to create the lock file exclusively
-                    fd = os.open(lockfile, os.O_CREAT | os.O_EXCL | os.O_RDWR)
-                    os.close(fd)
-                    break
-                except FileExistsError:
-                    if time.time() - start > timeout:
-                        raise TimeoutError(f"Timeout waiting for lock {lockfile}")
-                    time.sleep(0.2)
-            try:
-                yield
-            finally:
-                try:
-                    os.remove(lockfile)
-                except Exception:
-                    pass
-
-        lockfile = "mention_bot.lock"
+        # Intake happens here; analysis and posting run in the pipeline threads
+        pipeline = self.get_mention_pipeline()
 
         while True:
             try:
@@ -461,60 +407,55 @@ class TwitterClient:
                     users_map = {user.id: user for user in mentions_response.includes.get('users', [])}
                     for mention in reversed(mentions_response.data):
                         username = None  # Ensure username is always defined
-                        with file_lock(lockfile):
-                            try:
-                                # Only respond if mention is no more than 5 min old
-                                if not hasattr(mention, 'created_at') or mention.created_at is None:
-                                    author_id = getattr(mention, 'author_id', '?')
-                                    user = users_map.get(author_id)
-                                    username = user.username if user else None
-                                    if username:
-                                        print(f"[SKIP] Mention from @{username} (id: {author_id}) has no created_at, skipping.")
-                                    else:
-                                        print(f"[SKIP] Mention from @{author_id} has no created_at, skipping.")
-                                    continue
-                                mention_time = mention.created_at.replace(tzinfo=None)
-                                now_utc = datetime.utcnow()
-                                age_minutes = (now_utc - mention_time).total_seconds() / 60.0
-                                if age_minutes > 5:
-                                    print(f"[SKIP] Mention from @{getattr(mention, 'author_id', '?')} is {age_minutes:.1f} min old (>{5} min), skipping.")
-                                    continue
-                                author_id = mention.author_id
+                        try:
+                            # Only respond if mention is no more than 5 min old
+                            if not hasattr(mention, 'created_at') or mention.created_at is None:
+                                author_id = getattr(mention, 'author_id', '?')
                                 user = users_map.get(author_id)
-                                if not user:
-                                    print("User not found.")
-                                    continue
-                                username = user.username
-                                text = mention.text
-                                print(f"[MENTION] @{username}: {text}")
-                                company_ticker = self.extract_ticker_from_text(text)
-                                if not company_ticker:
-                                    print(f"[SKIP] No ticker found in mention from @{username}: '{text}'")
-                                    continue
-                                authorized = self.is_authorized(username)
-                                response_text, log_msg = self.get_mention_response(
-                                    market_open=market_open,
-                                    authorized=authorized,
-                                    company_ticker=company_ticker,
-                                    mention=mention,
-                                    username=username,
-                                    text=text
-                                )
-                                if response_text:
-                                    print(f"[DEBUG] About to post response for @{username}: {response_text}")
-                                    self.client.create_tweet(in_reply_to_tweet_id=mention.id, text=response_text)
-                                    print(log_msg)
+                                username = user.username if user else None
+                                if username:
+                                    print(f"[SKIP] Mention from @{username} (id: {author_id}) has no created_at, skipping.")
                                 else:
-                                    print(f"[SKIP] No response for @{username} ({company_ticker}). Log: {log_msg}")
-                                # Wait 55 seconds between answers to comply with X API rate limits
-                                time.sleep(55)
-                            except Exception as e:
-                                print(f"[ERROR] Could not process mention for @{username if username else '?'}: {e}")
-                                import traceback
-                                print(f"[DEBUG] Full error traceback: {traceback.format_exc()}")
+                                    print(f"[SKIP] Mention from @{author_id} has no created_at, skipping.")
+                                continue
+                            mention_time = mention.created_at.replace(tzinfo=None)
+                            now_utc = datetime.utcnow()
+                            age_minutes = (now_utc - mention_time).total_seconds() / 60.0
+                            if age_minutes > 5:
+                                print(f"[SKIP] Mention from @{getattr(mention, 'author_id', '?')} is {age_minutes:.1f} min old (>{5} min), skipping.")
+                                continue
+                            author_id = mention.author_id
+                            user = users_map.get(author_id)
+                            if not user:
+                                print("User not found.")
+                                continue
+                            username = user.username
+                            text = mention.text
+                            print(f"[MENTION] @{username}: {text}")
+                            company_ticker = self.extract_ticker_from_text(text)
+                            if not company_ticker:
+                                print(f"[SKIP] No ticker found in mention from @{username}: '{text}'")
                                 continue
+                            pipeline.submit(MentionJob(
+                                mention=mention,
+                                username=username,
+                                text=text,
+                                company_ticker=company_ticker,
+                                authorized=self.is_authorized(username),
+                                market_open=market_open
+                            ))
+                        except Exception as e:
+                            print(f"[ERROR] Could not process mention for @{username if username else '?'}: {e}")
+                            import traceback
+                            print(f"[DEBUG] Full error traceback: {traceback.format_exc()}")
+                            continue
 
                     last_mention_id = mentions_response.data[0].id
+                    stats = wj.cache_stats()
+                    print(f"[CACHE] JSON cache hits: {stats['hits']} | misses: {stats['misses']}")
+                    print(f"[CACHE] Company analysis cache: {self.company_analysis_cache.stats()}")
+                    import updater_jsons
+                    print(f"[CACHE] Ticker refreshes: {updater_jsons.refresh_stats()}")
 
                 # Temporizador hasta el próximo escaneo
                 for remaining in range(base_sleep, 0, -1):
@@ -1,14 +1,36 @@
+import os
+import threading
 import working_wjson as wj
 import news 
 import sentiment_analytics as sa
 import company_analyzer as ca
+import ttl_cache
+
+# Mentions are analyzed concurrently (mention_pipeline), so the shared
+# read-modify-write JSON files are updated under these locks
+_companies_lock = threading.Lock()
+_uncertainty_lock = threading.Lock()
+
+# Seconds a finished refresh is reused: mentions of the same ticker within
+# the window (or while it runs) share one refresh and its result
+REFRESH_WINDOW = int(os.getenv('XBOT_REFRESH_WINDOW', '300'))
+_refreshes = ttl_cache.TTLCache(ttl=REFRESH_WINDOW, max_entries=512)
+
+
+def refresh_stats():
+    """Hit/miss counters of the shared refresh registry."""
+    return _refreshes.stats()
+
+
+def _has_news(update):
+    # Empty extractions are not reused, so the next mention tries again
+    return any(isinstance(entry, dict) and entry for entry in update['news'].values())
 
 class updater_data():
     def __init__(self):
         self.companies_address= 'data/companies.json'
         self.companies= wj.load_from_json(self.companies_address)
         self.data_total_analyze_address='data/data_total_analyze.json'
-        self.data_total_analyze= wj.load_from_json(self.data_total_analyze_address)
         #leve this for later
         self.political_news_querie_address='data/political_news_queries.json'
         self.political_news= wj.load_from_json(self.political_news_querie_address)
@@ -18,8 +40,13 @@ class updater_data():
         self.company_analizer= ca.CompanyAnalyzer()
 
     def add_company_to_companies(self, new_company, new_ticker):
-        self.companies[new_company]= new_ticker
-        wj.save_to_json(self.companies, self.companies_address)
+        with _companies_lock:
+            # Reload so companies added by another worker are not lost
+            self.companies= wj.load_from_json(self.companies_address)
+            if self.companies.get(new_company) == new_ticker:
+                return
+            self.companies[new_company]= new_ticker
+            wj.save_to_json(self.companies, self.companies_address)
     
     def delete_company_from_companies(self):
         pass
@@ -30,12 +57,22 @@ class updater_data():
 
     def update_news(self,company_name):
         """
-        updating yf_news, google_news and x_tweets, then update sentiment and political uncertainty for this company
+        updating yf_news, google_news and x_tweets, then update sentiment and political uncertainty for this company.
+        Returns what was computed: {'news': {file: entry}, 'sentiment': metrics, 'political': value}
         """
-        self.news_extractor.save_single_company_news(company_name)
+        news_by_file = self.news_extractor.save_single_company_news(company_name) or {}
         # After saving news, update sentiment and political uncertainty for this company
-        self.update_data_analyze_for_company(company_name)
-        self.update_political_uncertainty_for_company(company_name)
+        sentiment = self.update_data_analyze_for_company(company_name)
+        political = self.update_political_uncertainty_for_company(company_name)
+        return {'news': news_by_file, 'sentiment': sentiment, 'political': political}
+
+    def refresh_company(self, company_name, ticker=None):
+        """
+        update_news shared per ticker: concurrent callers wait for the running
+        refresh, and later ones within REFRESH_WINDOW seconds reuse its result.
+        """
+        key = ('news', (ticker or company_name).upper())
+        return _refreshes.get_or_compute(key, lambda: self.update_news(company_name), cache_if=_has_news)
 
     def update_data_analyze_for_company(self, company_name):
         """
@@ -45,11 +82,9 @@ class updater_data():
         import company_analyzer as ca
         analyzer = ca.CompanyAnalyzer()
         metrics = analyzer.get_single_company_sentiment_metrics(company_name)
-        # Load and update data_total_analyze.json
-        data_path = self.data_total_analyze_address
-        data = wj.load_from_json(data_path)
-        data[company_name] = metrics
-        wj.save_to_json(data, data_path)
+        # Update only this company's entry in data_total_analyze
+        wj.get_store(self.data_total_analyze_address).put(company_name, metrics)
+        return metrics
 
     def update_political_uncertainty_for_company(self, company_name):
         """
@@ -58,10 +93,12 @@ class updater_data():
         # This is a placeholder: implement your real-time political uncertainty calculation here
         # For now, just set a default value if not present
         pol_path = 'data/uncertity_per_company.json'
-        pol = wj.load_from_json(pol_path)
-        if company_name not in pol:
-            pol[company_name] = 5  # Default moderate uncertainty
-            wj.save_to_json(pol, pol_path)
+        with _uncertainty_lock:
+            pol = wj.load_from_json(pol_path)
+            if company_name not in pol:
+                pol[company_name] = 5  # Default moderate uncertainty
+                wj.save_to_json(pol, pol_path)
+            return pol[company_name]
 
     def update_data_analyze(self):
         """
@@ -75,7 +112,8 @@ class updater_data():
 
     def update_all_json(self,new_company,new_ticker):
         self.add_company_to_companies(new_company,new_ticker)
-        self.update_news(new_company)
+        # The news refresh also updates this company's sentiment metrics
+        self.refresh_company(new_company, new_ticker)
         self.update_data_analyze()
         self.update_combine_prob
         
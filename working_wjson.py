@@ -1,20 +1,308 @@
+import copy
 import json
+import os
+import sqlite3
+import tempfile
+import threading
 
 
-def save_to_json(dictionary,filename):
+# Files whose top level is {company_name: value}. They live in a SQLite
+# store so a single-company update touches one row instead of rewriting
+# the whole file. load_from_json/save_to_json keep working for them.
+STORE_PATH = 'data/store.sqlite3'
+INDEXED_FILES = (
+    'data/yf_news.json',
+    'data/google_news.json',
+    'data/x_tweets.json',
+    'data/data_total_analyze.json',
+)
+
+# How hard save_to_json pushes data to disk before replacing the target:
+# 'none' only relies on the atomic rename, 'file' fsyncs the new file and
+# 'full' also fsyncs the directory so the rename survives a power loss.
+FSYNC_POLICY = os.getenv('XBOT_FSYNC', 'none')
+
+
+class CompanyStore:
+    """
+    Per-company key/value view over one indexed file.
+    get/put only read or write the row of the given company.
+    The first time a file is opened its legacy JSON content is imported.
+    """
+    _connections = {}
+    # Bumped on every write made through this process' connections
+    _local_writes = {}
+    _lock = threading.RLock()
+
+    def __init__(self, filename, db_path=STORE_PATH):
+        self.filename = os.path.normpath(filename)
+        self.db_path = db_path
+        self._cache = {}
+        self._cache_version = None
+        self._all = None
+        self._migrate()
+
+    def _connect(self):
+        with CompanyStore._lock:
+            conn = CompanyStore._connections.get(self.db_path)
+            if conn is None:
+                conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS entries ("
+                    "file TEXT NOT NULL, company TEXT NOT NULL, value TEXT NOT NULL, "
+                    "PRIMARY KEY (file, company))"
+                )
+                conn.execute("CREATE TABLE IF NOT EXISTS migrated (file TEXT PRIMARY KEY)")
+                conn.commit()
+                CompanyStore._connections[self.db_path] = conn
+                CompanyStore._local_writes[self.db_path] = 0
+            return conn
+
+    def _validate_cache(self, conn):
+        """Drop cached rows if this or another process wrote to the database."""
+        # data_version only changes for commits made by other connections,
+        # so writes made here are tracked with _local_writes.
+        version = (
+            conn.execute("PRAGMA data_version").fetchone()[0],
+            CompanyStore._local_writes[self.db_path],
+        )
+        if version != self._cache_version:
+            self._cache = {}
+            self._all = None
+            self._cache_version = version
+
+    def _wrote(self):
+        CompanyStore._local_writes[self.db_path] += 1
+
+    def _migrate(self):
+        """Import the legacy JSON file once, the first time the store is used for it."""
+        with CompanyStore._lock:
+            conn = self._connect()
+            done = conn.execute("SELECT 1 FROM migrated WHERE file = ?", (self.filename,)).fetchone()
+            if done:
+                return
+            legacy = {}
+            if os.path.exists(self.filename):
+                try:
+                    with open(self.filename, 'r') as file:
+                        legacy = json.load(file)
+                except (OSError, ValueError):
+                    legacy = {}
+            with conn:
+                if isinstance(legacy, dict):
+                    conn.executemany(
+                        "INSERT OR IGNORE INTO entries (file, company, value) VALUES (?, ?, ?)",
+                        [(self.filename, company, json.dumps(value)) for company, value in legacy.items()]
+                    )
+                conn.execute("INSERT INTO migrated (file) VALUES (?)", (self.filename,))
+            self._wrote()
+
+    def get(self, company, default=None):
+        with CompanyStore._lock:
+            conn = self._connect()
+            self._validate_cache(conn)
+            if company in self._cache:
+                _count(self.filename, hit=True)
+                value = self._cache[company]
+                return default if value is None else copy.deepcopy(value)
+            if self._all is not None:
+                _count(self.filename, hit=True)
+                return default
+            row = conn.execute(
+                "SELECT value FROM entries WHERE file = ? AND company = ?",
+                (self.filename, company)
+            ).fetchone()
+            _count(self.filename, hit=False)
+            value = None if row is None else json.loads(row[0])
+            self._cache[company] = value
+        return default if value is None else copy.deepcopy(value)
+
+    def put(self, company, value):
+        with CompanyStore._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT INTO entries (file, company, value) VALUES (?, ?, ?) "
+                    "ON CONFLICT(file, company) DO UPDATE SET value = excluded.value",
+                    (self.filename, company, json.dumps(value))
+                )
+            self._wrote()
+
+    def delete(self, company):
+        with CompanyStore._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "DELETE FROM entries WHERE file = ? AND company = ?",
+                    (self.filename, company)
+                )
+            self._wrote()
+
+    def keys(self):
+        with CompanyStore._lock:
+            rows = self._connect().execute(
+                "SELECT company FROM entries WHERE file = ? ORDER BY rowid",
+                (self.filename,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def load(self):
+        """Return the whole file as a dict (same shape as the legacy JSON)."""
+        with CompanyStore._lock:
+            conn = self._connect()
+            self._validate_cache(conn)
+            if self._all is not None:
+                _count(self.filename, hit=True)
+                return copy.deepcopy(self._all)
+            rows = conn.execute(
+                "SELECT company, value FROM entries WHERE file = ? ORDER BY rowid",
+                (self.filename,)
+            ).fetchall()
+            result = {}
+            for company, value in rows:
+                if company not in self._cache:
+                    self._cache[company] = json.loads(value)
+                result[company] = self._cache[company]
+            self._all = result
+            _count(self.filename, hit=False)
+            return copy.deepcopy(result)
+
+    def save(self, dictionary):
+        """Replace the whole file content with dictionary."""
+        with CompanyStore._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute("DELETE FROM entries WHERE file = ?", (self.filename,))
+                conn.executemany(
+                    "INSERT INTO entries (file, company, value) VALUES (?, ?, ?)",
+                    [(self.filename, company, json.dumps(value)) for company, value in dictionary.items()]
+                )
+            self._wrote()
+
+
+_stores = {}
+
+_indexed_paths = {os.path.normpath(f) for f in INDEXED_FILES}
+
+def is_indexed(filename):
+    return os.path.normpath(filename) in _indexed_paths
+
+def get_store(filename):
+    """Return the shared CompanyStore for an indexed file."""
+    key = os.path.normpath(filename)
+    with CompanyStore._lock:
+        if key not in _stores:
+            _stores[key] = CompanyStore(key)
+        return _stores[key]
+
+
+# Read-through cache for plain JSON files: {path: ((mtime_ns, size), data)}.
+# Callers get their own deep copy: the mention workers run concurrently and
+# modify what they load, which must not leak into other threads before saving.
+_json_cache = {}
+_cache_stats = {}
+_cache_lock = threading.Lock()
+
+def _count(filename, hit):
+    with _cache_lock:
+        stats = _cache_stats.setdefault(filename, {'hits': 0, 'misses': 0})
+        stats['hits' if hit else 'misses'] += 1
+
+def file_version(filename):
+    """Return (mtime_ns, size) of a file, or None if it does not exist."""
+    try:
+        st = os.stat(filename)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+def cache_stats():
+    """Hit/miss counters of the JSON cache, in total and per file."""
+    with _cache_lock:
+        files = {name: dict(stats) for name, stats in _cache_stats.items()}
+    return {
+        'hits': sum(stats['hits'] for stats in files.values()),
+        'misses': sum(stats['misses'] for stats in files.values()),
+        'files': files,
+    }
+
+def clear_cache():
+    with _cache_lock:
+        _json_cache.clear()
+        _cache_stats.clear()
+
+def _atomic_write_json(dictionary, filename, fsync=None):
+    """
+    Write JSON to a temp file in the same directory and os.replace it over
+    filename, so readers see either the old or the new file, never a partial one.
+    """
+    policy = FSYNC_POLICY if fsync is None else fsync
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(filename) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w') as file:
+            json.dump(dictionary, file)
+            if policy in ('file', 'full'):
+                file.flush()
+                os.fsync(file.fileno())
+        # mkstemp creates 0600 files, keep the permissions of the file we replace
+        try:
+            os.chmod(tmp_path, os.stat(filename).st_mode & 0o777)
+        except OSError:
+            os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, filename)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    if policy == 'full':
+        dir_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+def write_json(dictionary, filename, fsync=None):
+    """
+    Atomic write that bypasses the read-through cache, for callers that keep
+    their own copy of the data in memory (PersistentLRUCache): no deep copy
+    is made and any cached copy of filename is dropped.
+    """
+    _atomic_write_json(dictionary, filename, fsync)
+    with _cache_lock:
+        _json_cache.pop(os.path.normpath(filename), None)
+
+def save_to_json(dictionary,filename,fsync=None):
     # Prevent saving None or empty dicts (unless explicitly intended)
     if dictionary is None:
         return
     if isinstance(dictionary, dict) and len(dictionary) == 0:
         return
-    with open(filename,'w') as file:
-        json.dump(dictionary,file)
+    if is_indexed(filename) and isinstance(dictionary, dict):
+        get_store(filename).save(dictionary)
+        return
+    _atomic_write_json(dictionary, filename, fsync)
+    path = os.path.normpath(filename)
+    # Copied so later changes by the caller do not alter the cached content
+    with _cache_lock:
+        _json_cache[path] = (file_version(path), copy.deepcopy(dictionary))
 
 def load_from_json(filename):
+    if is_indexed(filename):
+        return get_store(filename).load()
+    path = os.path.normpath(filename)
+    version = file_version(path)
+    with _cache_lock:
+        entry = _json_cache.get(path)
+    if entry is not None and version is not None and entry[0] == version:
+        _count(path, hit=True)
+        return copy.deepcopy(entry[1])
     with open(filename, 'r') as file:
         dictionary=json.load(file)
+    _count(path, hit=False)
+    with _cache_lock:
+        _json_cache[path] = (version, copy.deepcopy(dictionary))
     return dictionary
-
-
-
-